@@ -1,23 +1,207 @@
 import json
 import datetime
+import itertools
+import os
+import re
+import sys
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from JournalStore import JournalStore
+from JsonLines import JsonLinesFile, iter_json_array
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "had", "has", "have", "i",
+    "in", "is", "it", "its", "me", "my", "of", "on", "or", "so", "that", "the", "their", "them", "they",
+    "this", "to", "us", "was", "we", "were", "with", "you", "your", "our", "there", "been", "would",
+    "very", "really", "just", "all", "also", "too",
+}
+NEGATIONS = {"not", "no", "never", "hardly", "isn't", "wasn't", "don't", "didn't", "doesn't", "won't", "can't"}
+# Word -> polarity weight used for the lexicon-based sentiment score.
+SENTIMENT_LEXICON = {
+    "good": 1, "great": 2, "excellent": 2, "amazing": 2, "love": 2, "loved": 2, "like": 1, "liked": 1,
+    "happy": 1, "helpful": 1, "friendly": 1, "fast": 1, "quick": 1, "easy": 1, "clean": 1, "perfect": 2,
+    "recommend": 1, "satisfied": 1, "nice": 1, "best": 2, "fresh": 1, "polite": 1, "awesome": 2,
+    "bad": -1, "poor": -1, "terrible": -2, "awful": -2, "hate": -2, "hated": -2, "slow": -1, "rude": -2,
+    "dirty": -1, "broken": -1, "expensive": -1, "worst": -2, "disappointed": -2, "disappointing": -2,
+    "late": -1, "wrong": -1, "difficult": -1, "unhappy": -1, "problem": -1, "confusing": -1, "cold": -1,
+}
+
+
+def rating_value(response):
+    """Return a response as a rating key such as "4" or "4.5", or None if it is not numeric."""
+    try:
+        value = float(response)
+    except (TypeError, ValueError):
+        return None
+    if value != value or value in (float("inf"), float("-inf")):
+        return None
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+def add_feedback_stats(stats, entry):
+    """Fold one feedback entry into the per-survey and per-question aggregates."""
+    survey = stats.setdefault(entry["survey_name"], {"responses": 0, "dates": {}, "questions": []})
+    survey["responses"] += 1
+    date = entry["date"][:10]
+    survey["dates"][date] = survey["dates"].get(date, 0) + 1
+    for index, response in enumerate(entry["responses"]):
+        while len(survey["questions"]) <= index:
+            survey["questions"].append({"answered": 0, "rated": 0, "rating_total": 0, "ratings": {}})
+        question = survey["questions"][index]
+        if str(response).strip():
+            question["answered"] += 1
+        rating = rating_value(response)
+        if rating is not None:
+            question["rated"] += 1
+            question["rating_total"] += float(rating)
+            question["ratings"][rating] = question["ratings"].get(rating, 0) + 1
+    return entry["survey_name"]
+
+
+def tokenize_response(text):
+    """Split free text into lowercase word tokens."""
+    return re.findall(r"[a-z]+(?:'[a-z]+)?", text.lower())
+
+
+def sentiment_score(tokens):
+    """Score tokens from -1 (negative) to 1 (positive) with the lexicon, flipping words after a negation."""
+    positive = negative = 0
+    negate = False
+    for token in tokens:
+        weight = SENTIMENT_LEXICON.get(token, 0)
+        if negate:
+            weight = -weight
+        if weight > 0:
+            positive += weight
+        elif weight < 0:
+            negative -= weight
+        negate = token in NEGATIONS
+    total = positive + negative
+    return (positive - negative) / total if total else 0.0
+
+
+def analyze_text_entry(entry):
+    """Tokenize one feedback entry's free-text answers and score them."""
+    tokens = []
+    for response in entry["responses"]:
+        if rating_value(response) is None:
+            tokens += tokenize_response(str(response))
+    # Negations are kept for phrases such as "not friendly" but are not keywords themselves.
+    terms = [token for token in tokens if token not in STOPWORDS and (len(token) > 2 or token in NEGATIONS)]
+    return {
+        "survey_name": entry["survey_name"],
+        "date": entry["date"],
+        "tokens": len(tokens),
+        "sentiment": sentiment_score(tokens),
+        "keywords": dict(Counter(term for term in terms if term not in NEGATIONS)),
+        "bigrams": dict(Counter(" ".join(pair) for pair in zip(terms, terms[1:]))),
+    }
+
+
+def analyze_text_chunk(entries):
+    """Analyze a chunk of feedback entries in a worker process.
+
+    Returns the chunk's cache lines already serialized, plus a summary of the
+    chunk, so the parent process only appends text and merges small totals.
+    """
+    summary = {"processed": 0, "surveys": {}}
+    lines = []
+    for entry in entries:
+        result = analyze_text_entry(entry)
+        add_text_summary(summary, result)
+        lines.append(json.dumps(result) + "\n")
+    return "".join(lines), summary
+
+
+def add_text_summary(summary, result):
+    """Fold one cached per-entry result into the per-survey text summary."""
+    survey = summary["surveys"].setdefault(
+        result["survey_name"], {"responses": 0, "sentiment_total": 0.0, "keywords": {}, "bigrams": {}}
+    )
+    survey["responses"] += 1
+    survey["sentiment_total"] += result["sentiment"]
+    for field in ("keywords", "bigrams"):
+        counts = survey[field]
+        for term, count in result[field].items():
+            counts[term] = counts.get(term, 0) + count
+    summary["processed"] += 1
+
+
+def merge_text_summary(summary, partial):
+    """Add a chunk summary from analyze_text_chunk into the running summary."""
+    for survey_name, part in partial["surveys"].items():
+        survey = summary["surveys"].setdefault(
+            survey_name, {"responses": 0, "sentiment_total": 0.0, "keywords": {}, "bigrams": {}}
+        )
+        survey["responses"] += part["responses"]
+        survey["sentiment_total"] += part["sentiment_total"]
+        for field in ("keywords", "bigrams"):
+            counts = survey[field]
+            for term, count in part[field].items():
+                counts[term] = counts.get(term, 0) + count
+    summary["processed"] += partial["processed"]
+
+
+def compute_feedback_stats(entries):
+    """Build the aggregates from any iterable of feedback entries, one entry at a time."""
+    stats = {}
+    for entry in entries:
+        add_feedback_stats(stats, entry)
+    return stats
+
+
+def rebuild_feedback_stats(feedback_file="feedback.json", stats_file="feedback_stats.json"):
+    """Recompute the aggregates by streaming a feedback file, so memory stays bounded by the stats."""
+    try:
+        stats = compute_feedback_stats(iter_json_array(feedback_file))
+    except FileNotFoundError:
+        stats = {}
+    temp_file = stats_file + ".tmp"
+    with open(temp_file, 'w') as file:
+        json.dump(stats, file, indent=4)
+    os.replace(temp_file, stats_file)
+    return stats
+
 
 class CustomerFeedbackSystem:
-    def __init__(self, surveys_file="surveys.json", feedback_file="feedback.json"):
+    def __init__(self, surveys_file="surveys.json", feedback_file="feedback.json",
+                 stats_file="feedback_stats.json", journal=False):
         self.surveys_file = surveys_file
         self.feedback_file = feedback_file
+        self.stats_file = stats_file
+        self.journal = journal
+        self.stores = {}
         self.surveys = self.load_data(self.surveys_file)
         self.feedback = self.load_data(self.feedback_file)
+        # Per-survey and per-question aggregates, kept in step with collect_feedback.
+        self.stats = self.load_data(self.stats_file, {})
+        if not self.stats and self.feedback:
+            self.stats.update(compute_feedback_stats(self.feedback))
+            self.save_data(self.stats_file, self.stats)
 
-    def load_data(self, filename):
-        """Load data from a JSON file."""
+    def load_data(self, filename, default=None):
+        """Load data from a JSON file, replaying its journal if journaling is on."""
+        default = [] if default is None else default
+        if self.journal:
+            self.stores[filename] = JournalStore(filename, default)
+            return self.stores[filename].load()
         try:
             with open(filename, 'r') as file:
                 return json.load(file)
         except (FileNotFoundError, json.JSONDecodeError):
-            return []
+            return default
 
-    def save_data(self, filename, data):
-        """Save data to a JSON file."""
+    def save_data(self, filename, data, op=None, keys=()):
+        """Save data to a JSON file, or journal only the changed records."""
+        store = self.stores.get(filename)
+        if store is not None:
+            if op is None:
+                store.save(data)
+            else:
+                store.record(data, op, keys)
+            return
         with open(filename, 'w') as file:
             json.dump(data, file, indent=4)
 
@@ -25,33 +209,134 @@ class CustomerFeedbackSystem:
         """Create a new customer survey with custom questions."""
         survey = {"survey_name": survey_name, "questions": questions}
         self.surveys.append(survey)
-        self.save_data(self.surveys_file, self.surveys)
+        self.save_data(self.surveys_file, self.surveys, "append")
         print(f"Survey '{survey_name}' created successfully!")
 
     def collect_feedback(self, survey_name, responses):
         """Collect customer feedback for a given survey."""
         feedback_entry = {"survey_name": survey_name, "responses": responses, "date": str(datetime.datetime.now())}
         self.feedback.append(feedback_entry)
-        self.save_data(self.feedback_file, self.feedback)
+        self.save_data(self.feedback_file, self.feedback, "append")
+        add_feedback_stats(self.stats, feedback_entry)
+        self.save_data(self.stats_file, self.stats, "set", [survey_name])
         print(f"Feedback recorded for survey '{survey_name}'.")
 
-    def analyze_feedback(self):
+    def analyze_feedback(self, recent_days=7):
         """Analyze feedback to identify trends and satisfaction scores."""
-        survey_analysis = {}
-        for entry in self.feedback:
-            survey_name = entry["survey_name"]
-            if survey_name not in survey_analysis:
-                survey_analysis[survey_name] = []
-            survey_analysis[survey_name].append(entry["responses"])
-        
+        questions_by_survey = {survey["survey_name"]: survey["questions"] for survey in self.surveys}
         print("Feedback Analysis:")
-        for survey, responses in survey_analysis.items():
-            print(f"Survey: {survey}, Total Responses: {len(responses)}")
+        for survey, stats in self.stats.items():
+            print(f"Survey: {survey}, Total Responses: {stats['responses']}")
+            recent = sorted(stats["dates"].items())[-recent_days:]
+            if recent:
+                print("  Responses by date: " + ", ".join(f"{date}: {count}" for date, count in recent))
+            questions = questions_by_survey.get(survey, [])
+            for index, question in enumerate(stats["questions"]):
+                text = questions[index] if index < len(questions) else f"Question {index + 1}"
+                line = f"  {text}: {question['answered']} answered"
+                if question["rated"]:
+                    average = question["rating_total"] / question["rated"]
+                    distribution = ", ".join(f"{rating}: {count}" for rating, count
+                                             in sorted(question["ratings"].items(), key=lambda item: float(item[0])))
+                    line += f", average rating {average:.2f} ({distribution})"
+                print(line)
+
+    def analyze_text(self, workers=None, chunk_size=2000, results_file="feedback_text.jsonl",
+                     summary_file="feedback_text.json", top_n=5):
+        """Run keyword, bigram and sentiment analysis over the free-text answers.
+
+        Per-entry results are cached in results_file in feedback order, and
+        summary_file holds per-survey totals with the number of entries folded
+        in, so a rerun only analyzes entries collected since the last one.
+        Chunks are spread over a process pool (workers=None uses every CPU);
+        with workers=1, or where a process pool cannot start, the chunks are
+        analyzed in this process instead.
+        """
+        results = JsonLinesFile(results_file)
+        empty = {"processed": 0, "cache_bytes": 0, "surveys": {}}
+        try:
+            with open(summary_file, 'r') as file:
+                summary = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            summary = empty
+        cache_bytes = os.path.getsize(results_file) if results else 0
+        if cache_bytes < summary["cache_bytes"] or summary["processed"] > len(self.feedback):
+            # The cache no longer matches the feedback history; start over.
+            results.save([])
+            summary, cache_bytes = empty, 0
+        if cache_bytes > summary["cache_bytes"]:
+            # Fold in results cached by a run that stopped before saving the summary.
+            with open(results_file, 'r+') as file:
+                file.seek(summary["cache_bytes"])
+                while True:
+                    offset = file.tell()
+                    line = file.readline()
+                    if not line:
+                        break
+                    try:
+                        add_text_summary(summary, json.loads(line))
+                    except json.JSONDecodeError:
+                        # Drop a line torn by a crash mid-write; it is analyzed again below.
+                        file.truncate(offset)
+                        break
+        start = summary["processed"]
+
+        chunks = (self.feedback[position:position + chunk_size]
+                  for position in range(start, len(self.feedback), chunk_size))
+        for lines, partial in self.map_text_chunks(chunks, workers or os.cpu_count()):
+            with open(results_file, 'a') as file:
+                file.write(lines)
+            merge_text_summary(summary, partial)
+        summary["cache_bytes"] = os.path.getsize(results_file) if results else 0
+        temp_file = summary_file + ".tmp"
+        with open(temp_file, 'w') as file:
+            json.dump(summary, file)
+        os.replace(temp_file, summary_file)
+        print(f"Analyzed {len(self.feedback) - start} new responses.")
+
+        print("Text Analysis:")
+        for survey_name, survey in summary["surveys"].items():
+            average = survey["sentiment_total"] / survey["responses"]
+            keywords = Counter(survey["keywords"]).most_common(top_n)
+            bigrams = Counter(survey["bigrams"]).most_common(top_n)
+            print(f"Survey: {survey_name}, Responses: {survey['responses']}, Average Sentiment: {average:+.2f}")
+            print("  Top keywords: " + ", ".join(f"{term} ({count})" for term, count in keywords))
+            print("  Top phrases: " + ", ".join(f"{term} ({count})" for term, count in bigrams))
+        return summary
+
+    def map_text_chunks(self, chunks, workers):
+        """Yield analyze_text_chunk results in order, keeping only a few chunks in flight.
+
+        If the process pool cannot start, breaks, or cannot pickle a chunk,
+        the chunks without a result yet are analyzed in-process instead.
+        """
+        chunks = iter(chunks)
+        pending = deque()
+        if workers > 1:
+            futures = deque()
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    for chunk in chunks:
+                        if len(futures) >= workers * 2:
+                            yield futures[0].result()
+                            futures.popleft()
+                            pending.popleft()
+                        pending.append(chunk)
+                        futures.append(executor.submit(analyze_text_chunk, chunk))
+                    while futures:
+                        yield futures[0].result()
+                        futures.popleft()
+                        pending.popleft()
+                return
+            except Exception:
+                pass
+        for chunk in itertools.chain(pending, chunks):
+            yield analyze_text_chunk(chunk)
 
     def run(self):
         """Main function to handle customer feedback interactions."""
         while True:
-            action = input("Choose an action: create_survey, collect_feedback, analyze_feedback, or quit: ")
+            action = input("Choose an action: create_survey, collect_feedback, analyze_feedback, analyze_text, or quit: ")
             if action == "quit":
                 break
             elif action == "create_survey":
@@ -77,9 +362,17 @@ class CustomerFeedbackSystem:
                     print("Survey not found.")
             elif action == "analyze_feedback":
                 self.analyze_feedback()
+            elif action == "analyze_text":
+                self.analyze_text()
             else:
                 print("Invalid action.")
 
 if __name__ == "__main__":
-    cfs = CustomerFeedbackSystem()
-    cfs.run()
+    if len(sys.argv) > 1 and sys.argv[1] == "--rebuild-stats":
+        feedback_file = sys.argv[2] if len(sys.argv) > 2 else "feedback.json"
+        stats_file = sys.argv[3] if len(sys.argv) > 3 else "feedback_stats.json"
+        stats = rebuild_feedback_stats(feedback_file, stats_file)
+        print(f"Rebuilt statistics for {len(stats)} surveys from {feedback_file}.")
+    else:
+        cfs = CustomerFeedbackSystem()
+        cfs.run()
@@ -1,23 +1,68 @@
 import json
+import os
+import sys
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from JournalStore import JournalStore
+from JsonLines import JsonLinesFile
+from SearchIndex import SearchIndex
 
 class CRMSystem:
-    def __init__(self, filename="customers.json"):
+    def __init__(self, filename="customers.json", journal=True, history_dir="purchase_history"):
         self.filename = filename
+        self.journal = journal
+        self.history_dir = history_dir
+        self.store = None
         self.customers = self.load_customers()
+        self.migrate_purchase_history()
+        # Built on the first search, so sessions that never search skip the cost.
+        self.search_index = None
 
     def load_customers(self):
-        """Load customer data from a JSON file."""
+        """Load customer data from a JSON file, replaying its journal if journaling is on."""
+        if self.journal:
+            self.store = JournalStore(self.filename, {})
+            return self.store.load()
         try:
             with open(self.filename, 'r') as file:
                 return json.load(file)
         except (FileNotFoundError, json.JSONDecodeError):
             return {}
 
-    def save_customers(self):
-        """Save the current customer data to a JSON file."""
+    def save_customers(self, op=None, keys=()):
+        """Save the current customer data to a JSON file, or journal only the changed records."""
+        if self.store is not None:
+            if op is None:
+                self.store.save(self.customers)
+            else:
+                self.store.record(self.customers, op, keys)
+            return
         with open(self.filename, 'w') as file:
             json.dump(self.customers, file, indent=4)
 
+    def history_segment(self, name):
+        """Return the append-only purchase history file for one customer."""
+        return JsonLinesFile(os.path.join(self.history_dir, quote(name, safe="") + ".jsonl"))
+
+    def purchase_history(self, name):
+        """Read a customer's purchases from their history segment."""
+        return list(self.history_segment(name))
+
+    def migrate_purchase_history(self):
+        """Move purchase histories stored inline in older files into per-customer segments."""
+        migrated = [name for name, customer in self.customers.items() if "purchase_history" in customer]
+        if not migrated:
+            return
+        os.makedirs(self.history_dir, exist_ok=True)
+        for name in migrated:
+            customer = self.customers[name]
+            history = customer.pop("purchase_history")
+            self.history_segment(name).save(history)
+            customer["purchase_count"] = len(history)
+            customer["total_spent"] = sum(purchase["amount"] for purchase in history)
+        self.save_customers()
+
     def add_customer(self, name, contact_info):
         """Add a new customer profile."""
         if name in self.customers:
@@ -25,31 +70,62 @@ class CRMSystem:
             return
         self.customers[name] = {
             "contact_info": contact_info,
-            "purchase_history": [],
-            "loyalty_points": 0
+            "loyalty_points": 0,
+            "purchase_count": 0,
+            "total_spent": 0
         }
-        self.save_customers()
+        self.save_customers("set", [name])
+        if self.search_index is not None:
+            self.search_index.add(name, name, contact_info)
         print(f"Customer {name} added successfully.")
 
     def remove_customer(self, name):
         """Remove a customer profile."""
         if name in self.customers:
             del self.customers[name]
-            self.save_customers()
+            self.save_customers("delete", [name])
+            if self.search_index is not None:
+                self.search_index.remove(name)
+            try:
+                os.remove(self.history_segment(name).filename)
+            except FileNotFoundError:
+                pass
             print(f"Customer {name} removed successfully.")
         else:
             print("Error: Customer not found.")
 
     def record_purchase(self, name, item, amount):
-        """Record a customer's purchase."""
+        """Record a customer's purchase.
+
+        The purchase is one line appended to the customer's history segment and
+        the updated counters are one journal line, so the cost does not grow
+        with the number of customers. With journal=False the counters are saved
+        by rewriting all of customers.json.
+        """
         if name in self.customers:
-            self.customers[name]["purchase_history"].append({"item": item, "amount": amount})
-            self.customers[name]["loyalty_points"] += int(amount / 10)  # Example: 1 point per $10 spent
-            self.save_customers()
+            os.makedirs(self.history_dir, exist_ok=True)
+            self.history_segment(name).append({"item": item, "amount": amount})
+            customer = self.customers[name]
+            customer["loyalty_points"] += int(amount / 10)  # Example: 1 point per $10 spent
+            customer["purchase_count"] += 1
+            customer["total_spent"] += amount
+            self.save_customers("set", [name])
             print(f"Purchase recorded for {name}.")
         else:
             print("Error: Customer not found.")
 
+    def get_search_index(self):
+        """Return the customer search index, building it on first use."""
+        if self.search_index is None:
+            self.search_index = SearchIndex()
+            for name, customer in self.customers.items():
+                self.search_index.add(name, name, customer["contact_info"])
+        return self.search_index
+
+    def search_customers(self, query, limit=10):
+        """Return up to limit customer names matching a partial name or contact, best first."""
+        return [name for name, _ in self.get_search_index().search(query, limit)]
+
     def display_customer(self, name):
         """Display a customer's details."""
         if name in self.customers:
@@ -57,12 +133,18 @@ class CRMSystem:
             print(f"\nCustomer: {name}")
             print(f"Contact Info: {customer['contact_info']}")
             print(f"Loyalty Points: {customer['loyalty_points']}")
+            print(f"Purchases: {customer['purchase_count']} totalling ${customer['total_spent']:.2f}")
             print("Purchase History:")
-            for purchase in customer["purchase_history"]:
+            for purchase in self.history_segment(name):
                 print(f" - {purchase['item']}: ${purchase['amount']}")
         else:
             print("Customer not found.")
 
+    def close(self):
+        """Fold the journal into customers.json."""
+        if self.store is not None:
+            self.store.close()
+
 
 def main():
     crm = CRMSystem()
@@ -73,7 +155,8 @@ def main():
         print("2. Remove Customer")
         print("3. Record Purchase")
         print("4. Display Customer")
-        print("5. Exit")
+        print("5. Search Customers")
+        print("6. Exit")
         choice = input("Choose an option: ")
 
         if choice == '1':
@@ -95,6 +178,14 @@ def main():
             name = input("Enter customer name: ")
             crm.display_customer(name)
         elif choice == '5':
+            query = input("Enter part of a name or contact: ")
+            matches = crm.search_customers(query)
+            if not matches:
+                print("No matching customers.")
+            for name in matches:
+                print(f"{name} - {crm.customers[name]['contact_info']}")
+        elif choice == '6':
+            crm.close()
             print("Exiting...")
             break
         else:
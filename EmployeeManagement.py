@@ -1,21 +1,43 @@
+import csv
 import json
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+from JournalStore import JournalStore
+from JsonLines import JsonLinesFile
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class EmployeeManagementSystem:
-    def __init__(self, filename="employees.json"):
+    def __init__(self, filename="employees.json", journal=False, time_entries_file="time_entries.jsonl"):
         self.filename = filename
+        self.journal = journal
+        self.store = None
         self.employees = self.load_data()
+        # Ledger of completed shifts, one line per clock-in/clock-out pair.
+        self.time_entries = JsonLinesFile(time_entries_file)
 
     def load_data(self):
-        """Load employee data from a JSON file."""
+        """Load employee data from a JSON file, replaying its journal if journaling is on."""
+        if self.journal:
+            self.store = JournalStore(self.filename, {})
+            return self.store.load()
         try:
             with open(self.filename, 'r') as file:
                 return json.load(file)
         except (FileNotFoundError, json.JSONDecodeError):
             return {}
 
-    def save_data(self):
-        """Save employee data to a JSON file."""
+    def save_data(self, op=None, keys=()):
+        """Save employee data to a JSON file, or journal only the changed records."""
+        if self.store is not None:
+            if op is None:
+                self.store.save(self.employees)
+            else:
+                self.store.record(self.employees, op, keys)
+            return
         with open(self.filename, 'w') as file:
             json.dump(self.employees, file, indent=4)
 
@@ -33,44 +55,96 @@ class EmployeeManagementSystem:
             "clock_in_time": None,
             "leave_requests": []
         }
-        self.save_data()
+        self.save_data("set", [emp_id])
         print(f"Employee {name} added successfully.")
 
     def remove_employee(self, emp_id):
         """Remove an employee profile."""
         if emp_id in self.employees:
             del self.employees[emp_id]
-            self.save_data()
+            self.save_data("delete", [emp_id])
             print("Employee removed successfully.")
         else:
             print("Error: Employee not found.")
 
+    def apply_punch(self, emp_id, timestamp, direction):
+        """Apply one clock punch in memory.
+
+        Returns (error, entry): error is a message if the punch is invalid, and
+        entry is the completed-shift ledger record for a valid clock-out.
+        """
+        if emp_id not in self.employees:
+            return "Employee not found.", None
+        employee = self.employees[emp_id]
+        if direction == "in":
+            if employee['clock_in_time']:
+                return "Employee already clocked in.", None
+            employee['clock_in_time'] = timestamp.isoformat()
+            return None, None
+        if direction != "out":
+            return f"Unknown punch direction '{direction}'.", None
+        if not employee['clock_in_time']:
+            return "Employee not clocked in.", None
+        clock_in_time = datetime.fromisoformat(employee['clock_in_time'])
+        if timestamp < clock_in_time:
+            return "Clock-out is earlier than clock-in.", None
+        work_hours = (timestamp - clock_in_time).total_seconds() / 3600
+        employee['work_hours'] += work_hours
+        employee['clock_in_time'] = None
+        entry = {
+            "emp_id": emp_id,
+            "clock_in": clock_in_time.isoformat(),
+            "clock_out": timestamp.isoformat(),
+            "hours": work_hours,
+            "name": employee['name'],
+            "hourly_wage": employee['hourly_wage']
+        }
+        return None, entry
+
     def clock_in(self, emp_id):
         """Clock in an employee."""
-        if emp_id in self.employees:
-            if self.employees[emp_id]['clock_in_time']:
-                print("Error: Employee already clocked in.")
-                return
-            self.employees[emp_id]['clock_in_time'] = datetime.now().isoformat()
-            self.save_data()
-            print(f"{self.employees[emp_id]['name']} clocked in.")
-        else:
-            print("Error: Employee not found.")
+        error, _ = self.apply_punch(emp_id, datetime.now(), "in")
+        if error:
+            print(f"Error: {error}")
+            return
+        self.save_data("set", [emp_id])
+        print(f"{self.employees[emp_id]['name']} clocked in.")
 
     def clock_out(self, emp_id):
         """Clock out an employee and calculate work hours."""
-        if emp_id in self.employees:
-            if not self.employees[emp_id]['clock_in_time']:
-                print("Error: Employee not clocked in.")
-                return
-            clock_in_time = datetime.fromisoformat(self.employees[emp_id]['clock_in_time'])
-            work_hours = (datetime.now() - clock_in_time).seconds / 3600
-            self.employees[emp_id]['work_hours'] += work_hours
-            self.employees[emp_id]['clock_in_time'] = None
-            self.save_data()
-            print(f"{self.employees[emp_id]['name']} clocked out. Worked {work_hours:.2f} hours.")
-        else:
-            print("Error: Employee not found.")
+        error, entry = self.apply_punch(emp_id, datetime.now(), "out")
+        if error:
+            print(f"Error: {error}")
+            return
+        self.time_entries.append(entry)
+        self.save_data("set", [emp_id])
+        print(f"{self.employees[emp_id]['name']} clocked out. Worked {entry['hours']:.2f} hours.")
+
+    def ingest_punches(self, punches):
+        """Apply a batch of (emp_id, timestamp, direction) punches and persist them together.
+
+        Punches are validated in timestamp order against the in-memory state.
+        Completed shifts are appended to the ledger in one write and the touched
+        employees are saved once. Returns the list of (punch, error) rejections.
+        """
+        rejected = []
+        entries = []
+        touched = []
+        for punch in sorted(punches, key=lambda punch: punch[1]):
+            emp_id, timestamp, direction = punch
+            error, entry = self.apply_punch(emp_id, timestamp, direction)
+            if error:
+                rejected.append((punch, error))
+                continue
+            if entry:
+                entries.append(entry)
+            if emp_id not in touched:
+                touched.append(emp_id)
+        if entries:
+            self.time_entries.extend(entries)
+        if touched:
+            self.save_data("set", touched)
+        return rejected
 
     def calculate_payroll(self):
         """Generate payroll report."""
@@ -79,26 +153,174 @@ class EmployeeManagementSystem:
             pay = data['work_hours'] * data['hourly_wage']
             print(f"{data['name']} - Hours: {data['work_hours']}, Pay: ${pay:.2f}")
 
+    def compute_pay_period(self, start, end, overtime_threshold=40.0, overtime_rate=1.5):
+        """Compute gross pay per employee for shifts that started in [start, end).
+
+        Hours are totalled per employee per week of the period (weeks counted
+        from start); hours above overtime_threshold in a week are paid at
+        overtime_rate. Returns one row per employee who worked in the period.
+        Employees removed since are paid at the wage recorded in their entries;
+        entries too old to carry a wage are reported and left out.
+        """
+        codes = {}
+        emp_codes, weeks, hours = [], [], []
+        details = {}
+        unpaid = []
+        for entry in self.time_entries:
+            clock_in = datetime.fromisoformat(entry["clock_in"])
+            if not start <= clock_in < end:
+                continue
+            emp_id = entry["emp_id"]
+            if emp_id in self.employees:
+                employee = self.employees[emp_id]
+                details[emp_id] = (employee['name'], employee['hourly_wage'])
+            elif "hourly_wage" in entry:
+                details[emp_id] = (entry.get("name", emp_id), entry["hourly_wage"])
+            else:
+                unpaid.append(entry)
+                continue
+            emp_codes.append(codes.setdefault(emp_id, len(codes)))
+            weeks.append((clock_in - start).days // 7)
+            hours.append(entry["hours"])
+        for entry in unpaid:
+            print(f"Warning: {entry['hours']:.2f} hours on {entry['clock_in']} for removed employee "
+                  f"{entry['emp_id']} have no recorded wage and were not paid.")
+        emp_ids = list(codes)
+        wages = [details[emp_id][1] for emp_id in emp_ids]
+        week_count = (end - start).days // 7 + 1
+
+        if np is not None:
+            # One cell per (employee, week); overtime is applied cell-wise.
+            cells = np.asarray(emp_codes, dtype=np.int64) * week_count + np.asarray(weeks, dtype=np.int64)
+            weekly = np.bincount(cells, weights=np.asarray(hours, dtype=float),
+                                 minlength=len(emp_ids) * week_count).reshape(len(emp_ids), week_count)
+            regular = np.minimum(weekly, overtime_threshold).sum(axis=1)
+            overtime = np.maximum(weekly - overtime_threshold, 0.0).sum(axis=1)
+            gross = (regular + overtime * overtime_rate) * np.asarray(wages, dtype=float)
+            regular, overtime, gross = regular.tolist(), overtime.tolist(), gross.tolist()
+        else:
+            weekly = {}
+            for code, week, worked in zip(emp_codes, weeks, hours):
+                weekly[(code, week)] = weekly.get((code, week), 0.0) + worked
+            regular = [0.0] * len(emp_ids)
+            overtime = [0.0] * len(emp_ids)
+            for (code, week), worked in weekly.items():
+                regular[code] += min(worked, overtime_threshold)
+                overtime[code] += max(worked - overtime_threshold, 0.0)
+            gross = [(regular[code] + overtime[code] * overtime_rate) * wages[code] for code in range(len(emp_ids))]
+
+        return [
+            {
+                "emp_id": emp_id,
+                "name": details[emp_id][0],
+                "regular_hours": round(regular[code], 2),
+                "overtime_hours": round(overtime[code], 2),
+                "gross_pay": round(gross[code], 2)
+            }
+            for code, emp_id in enumerate(emp_ids)
+        ]
+
+    def run_payroll(self, start, days=14, export_file=None, overtime_threshold=40.0, overtime_rate=1.5):
+        """Print pay for the period of `days` days from start and optionally export it as CSV."""
+        end = start + timedelta(days=days)
+        rows = self.compute_pay_period(start, end, overtime_threshold, overtime_rate)
+        print(f"\nPayroll Report {start:%Y-%m-%d} to {end - timedelta(days=1):%Y-%m-%d}:")
+        if not rows:
+            print("No time entries in this pay period.")
+        for row in rows:
+            print(f"{row['name']} - Regular: {row['regular_hours']}h, Overtime: {row['overtime_hours']}h, "
+                  f"Pay: ${row['gross_pay']:.2f}")
+        if export_file:
+            with open(export_file, 'w', newline='') as file:
+                writer = csv.DictWriter(file, fieldnames=["emp_id", "name", "regular_hours", "overtime_hours", "gross_pay"])
+                writer.writeheader()
+                writer.writerows(rows)
+            print(f"Payroll exported to {export_file}.")
+        return rows
+
     def request_leave(self, emp_id, reason):
         """Request leave for an employee."""
         if emp_id in self.employees:
             self.employees[emp_id]['leave_requests'].append({"reason": reason, "status": "Pending"})
-            self.save_data()
+            self.save_data("set", [emp_id])
             print("Leave request submitted.")
         else:
             print("Error: Employee not found.")
 
     def manage_leaves(self):
         """Approve or reject leave requests."""
+        updated = []
         for emp_id, data in self.employees.items():
             for request in data['leave_requests']:
                 if request['status'] == "Pending":
                     decision = input(f"Approve leave for {data['name']} (Reason: {request['reason']})? (y/n): ")
                     request['status'] = "Approved" if decision.lower() == 'y' else "Rejected"
-        self.save_data()
+                    updated.append(emp_id)
+        self.save_data("set", updated)
         print("Leave requests processed.")
 
 
+class TimeClockTerminal:
+    """Buffer punches from a time clock and ingest them in batches.
+
+    punch() only appends to an in-memory buffer, so its latency does not depend
+    on how many employees exist. A background thread hands the buffer to
+    EmployeeManagementSystem.ingest_punches every flush_interval seconds.
+    """
+
+    def __init__(self, system, flush_interval=2.0):
+        self.system = system
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.rejected = []
+        self.lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def punch(self, emp_id, direction, timestamp=None):
+        """Queue a clock-in ("in") or clock-out ("out") punch."""
+        with self.lock:
+            self.buffer.append((emp_id, timestamp or datetime.now(), direction))
+
+    def flush(self):
+        """Ingest every buffered punch with a single write."""
+        with self.lock:
+            batch, self.buffer = self.buffer, []
+        if batch:
+            rejected = self.system.ingest_punches(batch)
+            for (emp_id, timestamp, direction), error in rejected:
+                print(f"Rejected {direction} punch for {emp_id} at {timestamp:%H:%M:%S}: {error}")
+            self.rejected += rejected
+
+    def _flush_loop(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stop the background flusher and ingest any remaining punches."""
+        self._stopped.set()
+        self._flusher.join()
+        self.flush()
+
+
+def time_clock_terminal(system):
+    """Accept punches as "<emp_id> in" or "<emp_id> out" until a blank line."""
+    terminal = TimeClockTerminal(system)
+    print("Time clock ready. Enter '<Employee ID> in' or '<Employee ID> out', blank line to stop.")
+    while True:
+        line = input("> ").strip()
+        if not line:
+            break
+        parts = line.rsplit(maxsplit=1)
+        if len(parts) != 2 or parts[1].lower() not in ("in", "out"):
+            print("Invalid punch.")
+            continue
+        terminal.punch(parts[0], parts[1].lower())
+    terminal.close()
+    print("Time clock closed.")
+
+
 def main():
     system = EmployeeManagementSystem()
     
@@ -111,7 +333,8 @@ def main():
         print("5. Generate Payroll Report")
         print("6. Request Leave")
         print("7. Manage Leaves")
-        print("8. Exit")
+        print("8. Time Clock Terminal Mode")
+        print("9. Exit")
         choice = input("Choose an option: ")
 
         if choice == '1':
@@ -134,7 +357,18 @@ def main():
             emp_id = input("Enter Employee ID to clock out: ")
             system.clock_out(emp_id)
         elif choice == '5':
-            system.calculate_payroll()
+            period_start = input("Enter pay period start (YYYY-MM-DD, blank for running totals): ").strip()
+            if not period_start:
+                system.calculate_payroll()
+                continue
+            try:
+                start = datetime.strptime(period_start, "%Y-%m-%d")
+                days = int(input("Enter pay period length in days (default 14): ") or 14)
+            except ValueError:
+                print("Invalid date or length.")
+                continue
+            export_file = input("Export to CSV file (blank to skip): ").strip()
+            system.run_payroll(start, days, export_file or None)
         elif choice == '6':
             emp_id = input("Enter Employee ID: ")
             reason = input("Enter Leave Reason: ")
@@ -142,6 +376,8 @@ def main():
         elif choice == '7':
             system.manage_leaves()
         elif choice == '8':
+            time_clock_terminal(system)
+        elif choice == '9':
             print("Exiting...")
             break
         else:
@@ -1,66 +1,266 @@
+import heapq
 import json
 import datetime
+from JournalStore import JournalStore
+
+# Daily stat buckets older than this are dropped; it bounds the longest rolling window.
+WINDOW_DAYS = 90
 
 class EmployeePerformanceSystem:
-    def __init__(self, employees_file="employees.json", tasks_file="tasks.json", reviews_file="reviews.json"):
+    def __init__(self, employees_file="employees.json", tasks_file="tasks.json", reviews_file="reviews.json",
+                 stats_file="performance_stats.json", journal=True):
         self.employees_file = employees_file
         self.tasks_file = tasks_file
         self.reviews_file = reviews_file
+        self.stats_file = stats_file
+        self.journal = journal
+        self.stores = {}
         self.employees = self.load_data(self.employees_file)
         self.tasks = self.load_data(self.tasks_file)
         self.reviews = self.load_data(self.reviews_file)
+        self.build_indexes()
+        # Per-employee aggregates, kept in step with reviews and completions.
+        self.stats = self.load_data(self.stats_file, {})
+        if not self.stats and (self.reviews or self.tasks):
+            self.rebuild_stats()
+        self.build_leaderboard()
 
-    def load_data(self, filename):
-        """Load data from a JSON file."""
+    def load_data(self, filename, default=None):
+        """Load data from a JSON file, replaying its journal if journaling is on."""
+        default = [] if default is None else default
+        if self.journal:
+            self.stores[filename] = JournalStore(filename, default)
+            return self.stores[filename].load()
         try:
             with open(filename, 'r') as file:
                 return json.load(file)
         except (FileNotFoundError, json.JSONDecodeError):
-            return []
+            return default
 
-    def save_data(self, filename, data):
-        """Save data to a JSON file."""
+    def save_data(self, filename, data, op=None, keys=()):
+        """Save data to a JSON file, or journal only the changed records."""
+        store = self.stores.get(filename)
+        if store is not None:
+            if op is None:
+                store.save(data)
+            else:
+                store.record(data, op, keys)
+            return
         with open(filename, 'w') as file:
             json.dump(data, file, indent=4)
 
+    @staticmethod
+    def records(data, *fields):
+        """Yield (position, record) for list entries that are dicts with the given fields.
+
+        employees.json and tasks.json are also the default files of
+        EmployeeManagementSystem and TaskManager, which store other shapes;
+        entries this class cannot use are skipped rather than indexed.
+        """
+        if not isinstance(data, list):
+            return
+        for position, record in enumerate(data):
+            if isinstance(record, dict) and all(field in record for field in fields):
+                yield position, record
+
+    def build_indexes(self):
+        """Index employee positions by ID and open task positions by employee and name."""
+        self.employee_index = {}
+        for position, employee in self.records(self.employees, "employee_id"):
+            self.employee_index.setdefault(employee["employee_id"], position)
+        self.task_index = {}
+        self.open_tasks = {}
+        for position, task in self.records(self.tasks, "employee_id", "task_name"):
+            if not task.get("completed"):
+                self.index_task(position, task)
+
+    def index_task(self, position, task):
+        """Add one open task position to the task indexes."""
+        self.task_index.setdefault((task["employee_id"], task["task_name"]), position)
+        self.open_tasks.setdefault(task["employee_id"], set()).add(position)
+
+    def unindex_task(self, position, task):
+        """Remove a task position from the open task indexes."""
+        self.task_index.pop((task["employee_id"], task["task_name"]), None)
+        self.open_tasks.get(task["employee_id"], set()).discard(position)
+
+    def find_employee(self, employee_id):
+        """Return the employee record with the given ID, or None."""
+        position = self.employee_index.get(employee_id)
+        return None if position is None else self.employees[position]
+
+    def open_tasks_for(self, employee_id):
+        """Return an employee's open tasks in the order they were assigned."""
+        return [self.tasks[position] for position in sorted(self.open_tasks.get(employee_id, ()))]
+
     def add_employee(self, employee_id, name, role):
         """Add a new employee."""
+        if employee_id in self.employee_index:
+            print(f"Employee {employee_id} already exists.")
+            return
         self.employees.append({"employee_id": employee_id, "name": name, "role": role, "tasks_completed": 0})
-        self.save_data(self.employees_file, self.employees)
+        self.employee_index[employee_id] = len(self.employees) - 1
+        self.save_data(self.employees_file, self.employees, "append")
         print(f"Employee {name} added successfully!")
 
     def assign_task(self, employee_id, task_name, deadline):
         """Assign a task to an employee."""
+        if (employee_id, task_name) in self.task_index:
+            print(f"Employee {employee_id} already has an open task named '{task_name}'.")
+            return
         task = {"employee_id": employee_id, "task_name": task_name, "deadline": deadline, "completed": False}
         self.tasks.append(task)
-        self.save_data(self.tasks_file, self.tasks)
+        self.index_task(len(self.tasks) - 1, task)
+        self.save_data(self.tasks_file, self.tasks, "append")
         print(f"Task '{task_name}' assigned to employee {employee_id}.")
 
     def complete_task(self, employee_id, task_name):
         """Mark a task as completed and update productivity metrics."""
-        for task in self.tasks:
-            if task["employee_id"] == employee_id and task["task_name"] == task_name:
-                task["completed"] = True
-                for employee in self.employees:
-                    if employee["employee_id"] == employee_id:
-                        employee["tasks_completed"] += 1
-                self.save_data(self.tasks_file, self.tasks)
-                self.save_data(self.employees_file, self.employees)
-                print(f"Task '{task_name}' marked as completed for employee {employee_id}.")
-                return
-        print("Task not found or already completed.")
+        index = self.task_index.get((employee_id, task_name))
+        if index is None:
+            print("Task not found or already completed.")
+            return
+        task = self.tasks[index]
+        task["completed"] = True
+        task["completed_date"] = str(datetime.date.today())
+        self.unindex_task(index, task)
+        self.save_data(self.tasks_file, self.tasks, "set", [index])
+        self.add_completion_stats(employee_id, task, task["completed_date"])
+        self.save_data(self.stats_file, self.stats, "set", [employee_id])
+        position = self.employee_index.get(employee_id)
+        if position is not None:
+            self.employees[position]["tasks_completed"] += 1
+            self.save_data(self.employees_file, self.employees, "set", [position])
+        print(f"Task '{task_name}' marked as completed for employee {employee_id}.")
 
     def conduct_review(self, employee_id, rating, feedback):
         """Conduct a performance review for an employee."""
         review = {"employee_id": employee_id, "rating": rating, "feedback": feedback, "date": str(datetime.datetime.now())}
         self.reviews.append(review)
-        self.save_data(self.reviews_file, self.reviews)
+        self.save_data(self.reviews_file, self.reviews, "append")
+        self.add_review_stats(employee_id, rating, review["date"][:10])
+        self.save_data(self.stats_file, self.stats, "set", [employee_id])
+        self.update_leaderboard(employee_id)
         print(f"Performance review recorded for employee {employee_id}.")
 
+    def employee_stats(self, employee_id):
+        """Return the aggregate record for an employee, creating an empty one if needed."""
+        return self.stats.setdefault(employee_id, {"reviews": 0, "rating_total": 0, "on_time": 0, "late": 0, "days": {}})
+
+    def _bump_day(self, stats, day, reviews=0, rating=0, on_time=0, late=0):
+        """Add to one daily bucket and drop buckets that fell out of the longest window."""
+        bucket = stats["days"].setdefault(day, [0, 0, 0, 0])
+        bucket[0] += reviews
+        bucket[1] += rating
+        bucket[2] += on_time
+        bucket[3] += late
+        cutoff = str(datetime.date.today() - datetime.timedelta(days=WINDOW_DAYS))
+        for old_day in [old_day for old_day in stats["days"] if old_day < cutoff]:
+            del stats["days"][old_day]
+
+    def add_review_stats(self, employee_id, rating, day):
+        """Fold one review into the employee's running rating aggregates."""
+        stats = self.employee_stats(employee_id)
+        stats["reviews"] += 1
+        stats["rating_total"] += rating
+        self._bump_day(stats, day, reviews=1, rating=rating)
+
+    def add_completion_stats(self, employee_id, task, day):
+        """Count a completed task as on time or late against its deadline."""
+        try:
+            late = datetime.date.fromisoformat(day) > datetime.date.fromisoformat(task["deadline"])
+        except ValueError:
+            late = False
+        stats = self.employee_stats(employee_id)
+        stats["late" if late else "on_time"] += 1
+        self._bump_day(stats, day, on_time=int(not late), late=int(late))
+
+    def rebuild_stats(self):
+        """Recompute every aggregate from the reviews and completed tasks."""
+        self.stats.clear()
+        for _, review in self.records(self.reviews, "employee_id", "rating", "date"):
+            self.add_review_stats(review["employee_id"], review["rating"], review["date"][:10])
+        for _, task in self.records(self.tasks, "employee_id", "deadline"):
+            if task.get("completed"):
+                day = task.get("completed_date") or str(datetime.date.today())
+                self.add_completion_stats(task["employee_id"], task, day)
+        self.save_data(self.stats_file, self.stats)
+
+    def window_stats(self, employee_id, days):
+        """Sum an employee's reviews and completions over the last days days."""
+        cutoff = str(datetime.date.today() - datetime.timedelta(days=days))
+        reviews = rating_total = on_time = late = 0
+        for day, bucket in self.stats.get(employee_id, {}).get("days", {}).items():
+            if day > cutoff:
+                reviews += bucket[0]
+                rating_total += bucket[1]
+                on_time += bucket[2]
+                late += bucket[3]
+        return {
+            "reviews": reviews,
+            "average_rating": rating_total / reviews if reviews else None,
+            "on_time": on_time,
+            "late": late
+        }
+
+    def dashboard(self, employee_id):
+        """Return the all-time and rolling 30/90-day aggregates for an employee."""
+        stats = self.stats.get(employee_id)
+        if stats is None:
+            return None
+        return {
+            "reviews": stats["reviews"],
+            "average_rating": stats["rating_total"] / stats["reviews"] if stats["reviews"] else None,
+            "on_time": stats["on_time"],
+            "late": stats["late"],
+            "last_30_days": self.window_stats(employee_id, 30),
+            "last_90_days": self.window_stats(employee_id, WINDOW_DAYS)
+        }
+
+    def leaderboard_key(self, employee_id):
+        stats = self.stats[employee_id]
+        return (-stats["rating_total"] / stats["reviews"], -stats["reviews"], employee_id)
+
+    def build_leaderboard(self):
+        """Heap reviewed employees by average rating, then by review count."""
+        self.leaderboard_keys = {employee_id: self.leaderboard_key(employee_id)
+                                 for employee_id, stats in self.stats.items() if stats["reviews"]}
+        self.leaderboard = list(self.leaderboard_keys.values())
+        heapq.heapify(self.leaderboard)
+
+    def update_leaderboard(self, employee_id):
+        """Push an employee's new key in O(log n); their old heap entry is left to go stale.
+
+        Stale entries are dropped as top_employees pops past them, and the heap
+        is rebuilt from the live keys if they ever outnumber them.
+        """
+        new_key = self.leaderboard_key(employee_id)
+        self.leaderboard_keys[employee_id] = new_key
+        heapq.heappush(self.leaderboard, new_key)
+        if len(self.leaderboard) > 2 * len(self.leaderboard_keys):
+            self.leaderboard = list(self.leaderboard_keys.values())
+            heapq.heapify(self.leaderboard)
+
+    def top_employees(self, k=10):
+        """Return (employee_id, average_rating, reviews) for the k best-rated employees."""
+        top = []
+        while self.leaderboard and len(top) < k:
+            key = heapq.heappop(self.leaderboard)
+            if self.leaderboard_keys.get(key[2]) == key:
+                top.append(key)
+        for key in top:
+            heapq.heappush(self.leaderboard, key)
+        return [(employee_id, -average, -reviews) for average, reviews, employee_id in top]
+
+    def close(self):
+        """Fold the journals into their JSON files."""
+        for store in self.stores.values():
+            store.close()
+
     def run(self):
         """Main function to handle employee performance interactions."""
         while True:
-            action = input("Choose an action: add_employee, assign_task, complete_task, conduct_review, or quit: ")
+            action = input("Choose an action: add_employee, assign_task, complete_task, open_tasks, conduct_review, dashboard, leaderboard, or quit: ")
             if action == "quit":
                 break
             elif action == "add_employee":
@@ -77,14 +277,32 @@ class EmployeePerformanceSystem:
                 employee_id = input("Enter employee ID: ")
                 task_name = input("Enter task name: ")
                 self.complete_task(employee_id, task_name)
+            elif action == "open_tasks":
+                employee_id = input("Enter employee ID: ")
+                tasks = self.open_tasks_for(employee_id)
+                if not tasks:
+                    print("No open tasks.")
+                for task in tasks:
+                    print(f"{task['task_name']} (due {task['deadline']})")
             elif action == "conduct_review":
                 employee_id = input("Enter employee ID: ")
                 rating = int(input("Enter rating (1-5): "))
                 feedback = input("Enter feedback: ")
                 self.conduct_review(employee_id, rating, feedback)
+            elif action == "dashboard":
+                employee_id = input("Enter employee ID: ")
+                dashboard = self.dashboard(employee_id)
+                if dashboard is None:
+                    print("No reviews or completed tasks recorded for this employee.")
+                else:
+                    print(json.dumps(dashboard, indent=4))
+            elif action == "leaderboard":
+                for rank, (employee_id, average, reviews) in enumerate(self.top_employees(), start=1):
+                    print(f"{rank}. {employee_id}: {average:.2f} average over {reviews} reviews")
             else:
                 print("Invalid action.")
 
 if __name__ == "__main__":
     eps = EmployeePerformanceSystem()
     eps.run()
+    eps.close()
@@ -1,20 +1,44 @@
+import itertools
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from JournalStore import JournalStore
+from SearchIndex import SearchIndex
 
 class Inventory:
-    def __init__(self, filename="inventory.json"):
+    def __init__(self, filename="inventory.json", journal=False, storage=None):
         self.filename = filename
+        self.journal = journal
+        self.storage = storage
+        self.store = None
         self.items = self.load_inventory()
+        # Built on the first search, so sessions that never search skip the cost.
+        self.search_index = None
 
     def load_inventory(self):
-        """Load inventory data from a JSON file."""
+        """Load inventory data from a JSON file, its journal, or the shared storage engine."""
+        if self.storage is not None and self.storage.has_table(self.filename):
+            self.store = self.storage.table(self.filename)
+            return self.store.load()
+        if self.journal:
+            self.store = JournalStore(self.filename, {})
+            return self.store.load()
         try:
             with open(self.filename, 'r') as file:
                 return json.load(file)
         except (FileNotFoundError, json.JSONDecodeError):
             return {}
 
-    def save_inventory(self):
-        """Save the current inventory to a JSON file."""
+    def save_inventory(self, op=None, keys=()):
+        """Save the current inventory to a JSON file, or journal only the changed records."""
+        if self.store is not None:
+            if op is None:
+                self.store.save(self.items)
+            else:
+                self.store.record(self.items, op, keys)
+            return
         with open(self.filename, 'w') as file:
             json.dump(self.items, file, indent=4)
 
@@ -24,34 +48,71 @@ class Inventory:
             self.items[name]['quantity'] += quantity
         else:
             self.items[name] = {'price': price, 'quantity': quantity}
-        self.save_inventory()
+            if self.search_index is not None:
+                self.search_index.add(name, name)
+        self.save_inventory("set", [name])
         print(f"Added {quantity} of {name} at ${price} each.")
 
     def remove_item(self, name):
         """Remove an item from inventory."""
         if name in self.items:
             del self.items[name]
-            self.save_inventory()
+            self.save_inventory("delete", [name])
+            if self.search_index is not None:
+                self.search_index.remove(name)
             print(f"Removed {name} from inventory.")
         else:
             print("Error: Item not found.")
 
-    def display_inventory(self):
-        """Display the current inventory."""
-        if not self.items:
-            print("Inventory is empty.")
-        else:
-            print("\nCurrent Inventory:")
+    def iter_items(self, query=None, stock="all"):
+        """Yield (name, details) filtered by a name substring and by stock ("all", "in" or "out")."""
+        query = query.lower() if query else None
+        for name, details in self.items.items():
+            if query and query not in name.lower():
+                continue
+            if stock == "in" and details['quantity'] <= 0:
+                continue
+            if stock == "out" and details['quantity'] > 0:
+                continue
+            yield name, details
+
+    def display_inventory(self, query=None, stock="all", page=1, page_size=20):
+        """Display one page of the inventory; returns True if more pages follow."""
+        start = (page - 1) * page_size
+        shown = 0
+        more = False
+        for name, details in itertools.islice(self.iter_items(query, stock), start, start + page_size + 1):
+            if shown == page_size:
+                more = True
+                break
+            if not shown:
+                print(f"\nCurrent Inventory (page {page}):")
+            print(f"{name}: ${details['price']} - {details['quantity']} in stock")
+            shown += 1
+        if not shown:
+            print("Inventory is empty." if not self.items else "No matching items.")
+        return more
+
+    def get_search_index(self):
+        """Return the item search index, building it on first use."""
+        if self.search_index is None:
+            self.search_index = SearchIndex()
             for name, details in self.items.items():
-                print(f"{name}: ${details['price']} - {details['quantity']} in stock")
+                self.search_index.add(name, name, details.get("name"))
+        return self.search_index
 
-    def search_item(self, name):
-        """Search for an item and display its details."""
-        if name in self.items:
-            details = self.items[name]
-            print(f"\n{name}: ${details['price']} - {details['quantity']} in stock")
-        else:
+    def search_items(self, query, limit=10):
+        """Return up to limit item names matching a partial or misspelled name, best first."""
+        return [name for name, _ in self.get_search_index().search(query, limit)]
+
+    def search_item(self, name, limit=10):
+        """Search for an item and display its details, or the closest partial matches."""
+        matches = [name] if name in self.items else self.search_items(name, limit)
+        if not matches:
             print("Item not found.")
+        for match in matches:
+            details = self.items[match]
+            print(f"{match}: ${details['price']} - {details['quantity']} in stock")
 
 
 def main():
@@ -78,7 +139,13 @@ def main():
             name = input("Enter item name to remove: ")
             inventory.remove_item(name)
         elif choice == '3':
-            inventory.display_inventory()
+            query = input("Filter by name (blank for all): ").strip()
+            stock = input("Show all, in or out of stock items? (default all): ").strip().lower() or "all"
+            page = 1
+            while inventory.display_inventory(query, stock, page):
+                if input("Press Enter for the next page or q to stop: ").strip().lower() == 'q':
+                    break
+                page += 1
         elif choice == '4':
             name = input("Enter item name to search: ")
             inventory.search_item(name)
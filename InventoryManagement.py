@@ -1,37 +1,98 @@
 import json
 import datetime
+import os
+import time
+from contextlib import contextmanager
+from JournalStore import JournalStore
+from SharedInventory import SharedInventory
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 class OrderManagementSystem:
-    def __init__(self, inventory_file="inventory.json", orders_file="orders.json"):
+    def __init__(self, inventory_file="inventory.json", orders_file="orders.json", journal=False, storage=None, recommender=None, reorder_monitor=None, shared=False,
+                 inventory_store=None, orders_store=None, order_id_block=1):
         self.inventory_file = inventory_file
         self.orders_file = orders_file
+        self.recommender = recommender
+        self.reorder_monitor = reorder_monitor
+        self.journal = journal
+        self.storage = storage
+        self.shared = shared
+        self.inventory_store = inventory_store
+        self.orders_store = orders_store
+        self.stores = {}
+        self.order_id_file = orders_file + ".seq"
+        self.order_id_block = order_id_block
+        self.reserved_order_id = 0
         self.inventory = self.load_data(self.inventory_file)
         self.orders = self.load_data(self.orders_file)
+        self.build_order_index()
 
     def load_data(self, filename):
-        """Load data from a JSON file."""
+        """Load data from a JSON file, its journal, or the shared storage engine."""
+        default = {} if "inventory" in filename else []
+        if filename == self.inventory_file and self.inventory_store is not None:
+            # Another component owns the inventory; use its copy and persistence.
+            self.stores[filename] = self.inventory_store
+            return self.inventory_store.load()
+        if filename == self.orders_file and self.orders_store is not None:
+            self.stores[filename] = self.orders_store
+            return self.orders_store.load()
+        if self.storage is not None and self.storage.has_table(filename):
+            self.stores[filename] = self.storage.table(filename)
+            return self.stores[filename].load()
+        if self.shared and filename == self.inventory_file:
+            self.stores[filename] = SharedInventory(filename)
+            return self.stores[filename].load()
+        if self.journal:
+            self.stores[filename] = JournalStore(filename, default)
+            return self.stores[filename].load()
         try:
             with open(filename, 'r') as file:
                 return json.load(file)
         except (FileNotFoundError, json.JSONDecodeError):
-            return {} if "inventory" in filename else []
+            return default
+
+    def save_data(self, filename, data, op=None, keys=()):
+        """Save data to a JSON file, or journal only the changed records.
 
-    def save_data(self, filename, data):
-        """Save data to a JSON file."""
+        Without journal=True or a storage engine there is no per-record store,
+        so every save rewrites the whole file.
+        """
+        store = self.stores.get(filename)
+        if store is not None:
+            if op is None:
+                store.save(data)
+            else:
+                store.record(data, op, keys)
+            return
         with open(filename, 'w') as file:
             json.dump(data, file, indent=4)
 
     def place_order(self, customer_name, items):
         """Create a new order and update inventory."""
-        order_id = len(self.orders) + 1
-        total_price = 0
-        for barcode, quantity in items.items():
-            if barcode in self.inventory and self.inventory[barcode]['quantity'] >= quantity:
-                self.inventory[barcode]['quantity'] -= quantity
-                total_price += self.inventory[barcode]['price'] * quantity
-            else:
-                print(f"Error: Insufficient stock for {barcode}.")
+        store = self.stores.get(self.inventory_file)
+        shared = isinstance(store, SharedInventory)
+        if shared:
+            _, rejected = store.adjust(self.inventory, {barcode: -quantity for barcode, quantity in items.items()},
+                                       atomic=True)
+            if rejected:
+                print(f"Error: Insufficient stock for {rejected[0]}.")
                 return
+            total_price = sum(self.inventory[barcode]['price'] * quantity for barcode, quantity in items.items())
+        else:
+            total_price = 0
+            for barcode, quantity in items.items():
+                if barcode in self.inventory and self.inventory[barcode]['quantity'] >= quantity:
+                    self.inventory[barcode]['quantity'] -= quantity
+                    total_price += self.inventory[barcode]['price'] * quantity
+                else:
+                    print(f"Error: Insufficient stock for {barcode}.")
+                    return
+        order_id = self.allocate_order_id()
 
         order = {
             "order_id": order_id,
@@ -42,27 +103,116 @@ class OrderManagementSystem:
             "date": str(datetime.datetime.now())
         }
         self.orders.append(order)
-        self.save_data(self.orders_file, self.orders)
-        self.save_data(self.inventory_file, self.inventory)
+        if self.order_index is not None:
+            self.order_index[order_id] = len(self.orders) - 1
+        self.save_data(self.orders_file, self.orders, "append")
+        if not shared:
+            self.save_data(self.inventory_file, self.inventory, "set", items)
+        if self.reorder_monitor is not None:
+            for barcode in items:
+                self.reorder_monitor.stock_changed(barcode, self.inventory[barcode])
+        if self.recommender is not None:
+            self.recommender.record_order(items)
         print(f"Order {order_id} placed successfully!")
 
+    def build_order_index(self):
+        """Map each order_id to its position in self.orders and find the highest ID."""
+        if hasattr(self.orders, "index_of"):
+            # The storage engine already indexes order_id.
+            self.order_index = None
+            self.last_order_id = self.orders.max_key() or 0
+            return
+        self.order_index = {}
+        for index, order in enumerate(self.orders):
+            self.order_index.setdefault(order["order_id"], index)
+        self.last_order_id = max(self.order_index, default=0)
+
+    @contextmanager
+    def order_id_lock(self, timeout=10.0):
+        """Hold an exclusive lock on the order ID counter shared by every writer.
+
+        Uses flock on the counter file where the platform has it. Elsewhere
+        the lock is a <orders_file>.seq.lock file created with O_EXCL, and a
+        RuntimeError is raised if it cannot be taken within timeout seconds,
+        so IDs are never allocated without the lock.
+        """
+        if fcntl is not None:
+            with open(self.order_id_file, 'a') as file:
+                fcntl.flock(file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+            return
+        lock_file = self.order_id_file + ".lock"
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                descriptor = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                if time.monotonic() >= deadline:
+                    raise RuntimeError(f"Could not lock {self.order_id_file}; remove {lock_file} if no writer is running.")
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            os.close(descriptor)
+            os.remove(lock_file)
+
+    def allocate_order_id(self):
+        """Reserve the next order ID from a counter file shared by every writer.
+
+        The counter is read, advanced and written back under order_id_lock,
+        so concurrent processes never hand out the same ID. Each visit reserves
+        order_id_block IDs, which are then handed out from memory; a
+        long-running writer can raise it to sync the counter once per block
+        instead of once per order, at the cost of gaps left by unused IDs.
+        """
+        if self.last_order_id < self.reserved_order_id:
+            self.last_order_id += 1
+            return self.last_order_id
+        with self.order_id_lock(), open(self.order_id_file, 'a+') as file:
+            file.seek(0)
+            text = file.read().strip()
+            order_id = max(int(text) if text else 0, self.last_order_id) + 1
+            reserved = order_id + max(self.order_id_block, 1) - 1
+            file.seek(0)
+            file.truncate()
+            file.write(str(reserved))
+            file.flush()
+            os.fsync(file.fileno())
+        self.last_order_id = order_id
+        self.reserved_order_id = reserved
+        return order_id
+
+    def find_order(self, order_id):
+        """Return the position of an order in self.orders, or None if it does not exist."""
+        if self.order_index is None:
+            return self.orders.index_of(order_id)
+        return self.order_index.get(order_id)
+
     def update_order_status(self, order_id, status):
-        """Update the status of an existing order."""
-        for order in self.orders:
-            if order["order_id"] == order_id:
-                order["status"] = status
-                self.save_data(self.orders_file, self.orders)
-                print(f"Order {order_id} status updated to {status}.")
-                return
-        print("Order not found.")
+        """Update the status of an existing order.
+
+        With journal=True or a storage engine only this order is written;
+        with plain JSON files the whole orders file is rewritten.
+        """
+        index = self.find_order(order_id)
+        if index is None:
+            print("Order not found.")
+            return
+        self.orders[index]["status"] = status
+        self.save_data(self.orders_file, self.orders, "set", [index])
+        print(f"Order {order_id} status updated to {status}.")
 
     def track_order(self, order_id):
         """Retrieve and display order details."""
-        for order in self.orders:
-            if order["order_id"] == order_id:
-                print("Order Details:", json.dumps(order, indent=4))
-                return
-        print("Order not found.")
+        index = self.find_order(order_id)
+        if index is None:
+            print("Order not found.")
+            return
+        print("Order Details:", json.dumps(self.orders[index], indent=4))
 
     def run(self):
         """Main function to handle order management interactions."""
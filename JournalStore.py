@@ -0,0 +1,226 @@
+import json
+import os
+import threading
+
+
+def sync_directory(filename):
+    """Make a rename or newly created file in filename's directory durable."""
+    descriptor = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class JournalStore:
+    """Append-only write-ahead journal in front of a JSON snapshot file.
+
+    Changes are appended to "<filename>.journal" as one JSON line per save
+    instead of re-serializing the whole collection. A background thread folds
+    the journal back into the snapshot every few seconds, or sooner once enough
+    changes pile up. The first journal line records which snapshot the journal
+    applies to, so a journal left over from an interrupted compaction is
+    ignored rather than replayed twice. A journal ending in a torn line is
+    compacted as soon as it is loaded, so later writes are never appended
+    after the damage.
+    """
+
+    def __init__(self, filename, default, compact_interval=30.0, compact_threshold=1000, sync=True):
+        self.filename = filename
+        self.journal_file = filename + ".journal"
+        self.default = default
+        self.compact_interval = compact_interval
+        self.compact_threshold = compact_threshold
+        self.sync = sync
+        self.pending = 0
+        self.lock = threading.RLock()
+        self.snapshot_id = None
+        self.torn = False
+        self._journal = None
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def _fingerprint(self):
+        """Identify the current snapshot file by inode, size and mtime."""
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    def _read_snapshot(self):
+        try:
+            with open(self.filename, 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return type(self.default)()
+
+    def _read_journal(self, own=False):
+        """Yield the change sets recorded against the snapshot on disk.
+
+        With own=True, yield those recorded against the snapshot this process
+        started the journal on instead. Sets self.torn when the journal ends in
+        an incomplete line.
+        """
+        self.torn = False
+        try:
+            file = open(self.journal_file, 'r')
+        except FileNotFoundError:
+            return
+        with file:
+            try:
+                header = json.loads(file.readline())
+            except json.JSONDecodeError:
+                return
+            if header.get("snapshot") != (self.snapshot_id if own else self._fingerprint()):
+                return
+            for line in file:
+                try:
+                    changes = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write is dropped whole.
+                    self.torn = True
+                    return
+                if not line.endswith("\n"):
+                    self.torn = True
+                yield changes
+
+    def _write_snapshot(self, data):
+        temp_file = self.filename + ".tmp"
+        with open(temp_file, 'w') as file:
+            json.dump(data, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file, self.filename)
+
+    def _reset_journal(self):
+        """Start an empty journal bound to the snapshot currently on disk."""
+        if self._journal is not None:
+            self._journal.close()
+        temp_file = self.journal_file + ".tmp"
+        self.snapshot_id = self._fingerprint()
+        with open(temp_file, 'w') as file:
+            file.write(json.dumps({"snapshot": self.snapshot_id}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file, self.journal_file)
+        self._journal = open(self.journal_file, 'a')
+        self.pending = 0
+
+    @staticmethod
+    def apply(data, changes):
+        """Apply one recorded change set to an in-memory collection."""
+        for change in changes:
+            op = change["op"]
+            if op == "append":
+                data.append(change["value"])
+            elif op == "set":
+                key = change["key"]
+                if isinstance(data, list) and key == len(data):
+                    data.append(change["value"])
+                else:
+                    data[key] = change["value"]
+            elif op == "delete":
+                if isinstance(data, list):
+                    del data[change["key"]]
+                else:
+                    data.pop(change["key"], None)
+        return data
+
+    def load(self):
+        """Load the snapshot, replay the journal on top of it and start compaction."""
+        with self.lock:
+            data = self._read_snapshot()
+            pending = 0
+            for changes in self._read_journal():
+                self.apply(data, changes)
+                pending += 1
+            if self.torn:
+                self._write_snapshot(data)
+                self._reset_journal()
+            elif pending:
+                self.snapshot_id = self._fingerprint()
+                self._journal = open(self.journal_file, 'a')
+                self.pending = pending
+            else:
+                self._reset_journal()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._compact_loop, daemon=True)
+            self._thread.start()
+        return data
+
+    def changes_for(self, data, op, keys=()):
+        """Describe an in-place change to data as journal records."""
+        if op == "append":
+            return [{"op": "append", "value": data[-1]}]
+        if op == "set":
+            return [{"op": "set", "key": key, "value": data[key]} for key in keys]
+        if op == "delete":
+            return [{"op": "delete", "key": key} for key in keys]
+        raise ValueError(f"Unknown journal operation: {op}")
+
+    def record(self, data, op, keys=()):
+        """Journal a change that has already been applied to data."""
+        self.write(self.changes_for(data, op, keys))
+
+    def write(self, changes):
+        """Append one change set to the journal as a single durable line."""
+        with self.lock:
+            self._journal.write(json.dumps(changes) + "\n")
+            self._journal.flush()
+            if self.sync:
+                os.fsync(self._journal.fileno())
+            self.pending += 1
+            if self.pending >= self.compact_threshold:
+                self._wake.set()
+
+    def flush(self):
+        """Force journaled changes, and any compaction renames, to disk."""
+        with self.lock:
+            if self._journal is not None:
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
+            sync_directory(self.filename)
+
+    def save(self, data):
+        """Write a full snapshot of data and discard the journal."""
+        with self.lock:
+            self._write_snapshot(data)
+            self._reset_journal()
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot rebuilt from disk.
+
+        The journal is replayed against the snapshot it was started on, so if
+        a tool without journaling rewrote the file in the meantime this
+        process's changes are applied on top of that rewrite, not dropped.
+        """
+        with self.lock:
+            if not self.pending:
+                return
+            self._journal.flush()
+            data = self._read_snapshot()
+            for changes in self._read_journal(own=True):
+                self.apply(data, changes)
+            self._write_snapshot(data)
+            self._reset_journal()
+
+    def _compact_loop(self):
+        while not self._closed:
+            self._wake.wait(self.compact_interval)
+            self._wake.clear()
+            if not self._closed:
+                self.compact()
+
+    def close(self):
+        """Stop background compaction and leave a fully compacted snapshot."""
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self.lock:
+            self.compact()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
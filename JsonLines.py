@@ -0,0 +1,203 @@
+import json
+import os
+import sys
+
+
+class JsonLinesFile:
+    """Line-delimited JSON file used as a streaming list of records.
+
+    Iterating reads one record at a time, so memory use does not grow with the
+    size of the file. Appends write a single line. Instances expose the same
+    load/record/save methods as the other stores, so they can stand in for a
+    list loaded from a JSON array.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def __iter__(self):
+        try:
+            file = open(self.filename, 'r')
+        except FileNotFoundError:
+            return
+        with file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    def __len__(self):
+        try:
+            with open(self.filename, 'r') as file:
+                return sum(1 for line in file if line.strip())
+        except FileNotFoundError:
+            return 0
+
+    def __bool__(self):
+        try:
+            return os.path.getsize(self.filename) > 0
+        except FileNotFoundError:
+            return False
+
+    def append(self, record):
+        """Append one record as a new line."""
+        with open(self.filename, 'a') as file:
+            file.write(json.dumps(record) + "\n")
+
+    def extend(self, records):
+        """Append several records with a single write."""
+        with open(self.filename, 'a') as file:
+            file.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def load(self):
+        return self
+
+    def record(self, data, op, keys=()):
+        """Appends are written immediately; other in-place changes are not supported."""
+        if op != "append":
+            raise TypeError(f"{self.filename} only supports appending records.")
+
+    def save(self, data):
+        """Rewrite the file from an iterable of records."""
+        if data is self:
+            return
+        temp_file = self.filename + ".tmp"
+        with open(temp_file, 'w') as file:
+            for record in data:
+                file.write(json.dumps(record) + "\n")
+        os.replace(temp_file, self.filename)
+
+
+def iter_json_array(filename, chunk_size=1 << 16):
+    """Yield the elements of a JSON array file without loading the whole array."""
+    decoder = json.JSONDecoder()
+    with open(filename, 'r') as file:
+        buffer = ""
+        position = 0
+        started = False
+        eof = False
+        while True:
+            # Skip whitespace, the opening bracket and separators between elements.
+            while position < len(buffer) and buffer[position] in " \t\r\n,[":
+                if buffer[position] == "[":
+                    started = True
+                position += 1
+            if position < len(buffer) and buffer[position] == "]" and started:
+                return
+            if position >= len(buffer) or not started:
+                if eof:
+                    return
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = None
+            if end is None or (end == len(buffer) and not eof):
+                # The element may continue past the buffered text; read more.
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield value
+            position = end
+
+
+class JsonArrayFile(JsonLinesFile):
+    """JSON array file used as a streaming list of records.
+
+    Iterating decodes one element at a time with iter_json_array. Appends
+    rewrite only the closing bracket, so the file stays a valid JSON array for
+    the programs that load it whole.
+    """
+
+    def __iter__(self):
+        try:
+            yield from iter_json_array(self.filename)
+        except FileNotFoundError:
+            return
+
+    def __len__(self):
+        return sum(1 for record in self)
+
+    def __bool__(self):
+        for record in self:
+            return True
+        return False
+
+    def append(self, record):
+        """Append one record before the closing bracket."""
+        self.extend([record])
+
+    def extend(self, records):
+        """Append several records with a single write before the closing bracket."""
+        text = ",\n".join(json.dumps(record) for record in records)
+        if not text:
+            return
+        try:
+            file = open(self.filename, 'r+b')
+        except FileNotFoundError:
+            with open(self.filename, 'w') as file:
+                file.write("[\n" + text + "\n]")
+            return
+        with file:
+            end = file.seek(0, os.SEEK_END)
+            position = end
+            tail = b""
+            while position > 0 and b"]" not in tail:
+                position = max(0, position - 4096)
+                file.seek(position)
+                tail = file.read(end - position)
+            bracket = position + tail.rfind(b"]")
+            before = tail[:tail.rfind(b"]")].rstrip()
+            if not before.endswith(b"["):
+                text = ",\n" + text
+            file.seek(bracket)
+            file.write((text + "\n]").encode())
+            file.truncate()
+
+    def save(self, data):
+        """Rewrite the file as a JSON array from an iterable of records."""
+        if data is self:
+            return
+        temp_file = self.filename + ".tmp"
+        with open(temp_file, 'w') as file:
+            json.dump(list(data), file, indent=4)
+        os.replace(temp_file, self.filename)
+
+
+def open_records(filename):
+    """Return a streaming record file for filename: JSON-lines, or a JSON array if it holds one."""
+    try:
+        with open(filename, 'r') as file:
+            first = file.read(64).lstrip()[:1]
+    except FileNotFoundError:
+        first = ""
+    if first == "[" or (not first and not filename.endswith(".jsonl")):
+        return JsonArrayFile(filename)
+    return JsonLinesFile(filename)
+
+
+def convert_json_array(json_file, jsonl_file):
+    """Convert a JSON array file into a line-delimited file, one record at a time."""
+    count = 0
+    temp_file = jsonl_file + ".tmp"
+    with open(temp_file, 'w') as file:
+        for record in iter_json_array(json_file):
+            file.write(json.dumps(record) + "\n")
+            count += 1
+    os.replace(temp_file, jsonl_file)
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python JsonLines.py <input.json> <output.jsonl>")
+        sys.exit(1)
+    converted = convert_json_array(sys.argv[1], sys.argv[2])
+    print(f"Converted {converted} records from {sys.argv[1]} to {sys.argv[2]}.")
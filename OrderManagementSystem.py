@@ -1,51 +1,229 @@
+import ast
 import json
 import datetime
+import os
 import random
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import combinations
+from JournalStore import JournalStore
+from JsonLines import open_records
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Pairs of integer product ids (a, b) with a < b are encoded as a * PAIR_BASE + b.
+PAIR_BASE = 1 << 32
+
+
+def count_pair_shard(shard):
+    """Count co-purchased pairs in a shard of orders given as sorted product ids.
+
+    Returns parallel sequences of pair codes and counts.
+    """
+    codes = (a * PAIR_BASE + b for ids in shard for a, b in combinations(ids, 2))
+    if np is not None:
+        unique, counts = np.unique(np.fromiter(codes, dtype=np.int64), return_counts=True)
+        return unique, counts
+    counter = Counter(codes)
+    return list(counter.keys()), list(counter.values())
+
+
+def merge_pair_counts(partials):
+    """Merge per-shard (codes, counts) results into one (codes, counts) pair."""
+    partials = list(partials)
+    if np is not None:
+        if not partials:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        codes = np.concatenate([codes for codes, _ in partials])
+        counts = np.concatenate([counts for _, counts in partials])
+        unique, inverse = np.unique(codes, return_inverse=True)
+        return unique, np.bincount(inverse, weights=counts).astype(np.int64)
+    merged = Counter()
+    for codes, counts in partials:
+        merged.update(dict(zip(codes, counts)))
+    return list(merged.keys()), list(merged.values())
 
 class ProductRecommendationEngine:
-    def __init__(self, inventory_file="inventory.json", orders_file="orders.json", recommendations_file="recommendations.json"):
+    def __init__(self, inventory_file="inventory.json", orders_file="orders.json", recommendations_file="recommendations.json", journal=False, storage=None, top_k=10, streaming=False):
         self.inventory_file = inventory_file
         self.orders_file = orders_file
         self.recommendations_file = recommendations_file
+        self.journal = journal
+        self.storage = storage
+        self.stores = {}
+        self.top_k = top_k
+        self.streaming = streaming
         self.inventory = self.load_data(self.inventory_file)
         self.orders = self.load_data(self.orders_file)
-        self.recommendations = self.load_data(self.recommendations_file)
+        self.recommendations = self.load_recommendations()
 
     def load_data(self, filename):
-        """Load data from a JSON file."""
+        """Load data from a JSON file, its journal, or the shared storage engine."""
+        default = {} if "inventory" in filename or "recommendations" in filename else []
+        if self.streaming and "orders" in filename:
+            # Orders are read one record at a time, from a JSON array or a line-delimited file.
+            self.stores[filename] = open_records(filename)
+            return self.stores[filename].load()
+        if self.storage is not None and self.storage.has_table(filename):
+            self.stores[filename] = self.storage.table(filename)
+            return self.stores[filename].load()
+        if self.journal:
+            self.stores[filename] = JournalStore(filename, default)
+            return self.stores[filename].load()
         try:
             with open(filename, 'r') as file:
                 return json.load(file)
         except (FileNotFoundError, json.JSONDecodeError):
-            return {} if "inventory" in filename else []
+            return default
 
-    def save_data(self, filename, data):
-        """Save data to a JSON file."""
+    def save_data(self, filename, data, op=None, keys=()):
+        """Save data to a JSON file, or journal only the changed records."""
+        store = self.stores.get(filename)
+        if store is not None:
+            if op is None:
+                store.save(data)
+            else:
+                store.record(data, op, keys)
+            return
         with open(filename, 'w') as file:
             json.dump(data, file, indent=4)
 
-    def generate_recommendations(self):
-        """Generate product recommendations based on previous purchases."""
-        product_pairs = {}
+    def load_recommendations(self):
+        """Load the neighbor index, converting the old pair-keyed format if needed.
+
+        The index maps each product to the co-purchase counts of its partners
+        ("neighbors") and to its top_k partners ranked by count ("top").
+        """
+        data = self.load_data(self.recommendations_file)
+        if not data or isinstance(next(iter(data.values())), dict):
+            return data
+        neighbors = {}
+        for pair, count in data.items():
+            first, second = ast.literal_eval(pair)
+            neighbors.setdefault(first, {})[second] = count
+            neighbors.setdefault(second, {})[first] = count
+        index = self.build_index(neighbors)
+        # Save the new format at once so later per-product writes never land on the old one.
+        self.save_data(self.recommendations_file, index)
+        return index
+
+    def rank_partners(self, partners):
+        """Return the top_k partners of a product as [partner, count] pairs."""
+        ranked = sorted(partners.items(), key=lambda pair: (-pair[1], pair[0]))
+        return [[partner, count] for partner, count in ranked[:self.top_k]]
+
+    def build_index(self, neighbors):
+        """Build the persisted index from per-product partner counts."""
+        return {
+            product: {"neighbors": partners, "top": self.rank_partners(partners)}
+            for product, partners in neighbors.items()
+        }
+
+    def iter_order_shards(self, ids, shard_size):
+        """Yield lists of orders encoded as sorted integer product ids, assigning new ids as seen."""
+        shard = []
+        for order in self.orders:
+            shard.append(sorted({ids.setdefault(item, len(ids)) for item in order["items"]}))
+            if len(shard) == shard_size:
+                yield shard
+                shard = []
+        if shard:
+            yield shard
+
+    def count_pairs_parallel(self, workers, shard_size=10000):
+        """Count co-purchases by sharding orders across a process pool.
+
+        Product names are mapped to integer ids so that workers only exchange
+        compact pair codes, which are merged back into per-product partner counts.
+        Orders are read and submitted a few shards at a time, so a streamed
+        order history is never held in memory at once.
+        """
+        ids = {}
+        partials = []
+        pending = set()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for shard in self.iter_order_shards(ids, shard_size):
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    partials += [future.result() for future in done]
+                    if len(partials) >= workers * 4:
+                        partials = [merge_pair_counts(partials)]
+                pending.add(executor.submit(count_pair_shard, shard))
+            partials += [future.result() for future in pending]
+        codes, counts = merge_pair_counts(partials)
+
+        products = list(ids)
+        neighbors = {}
+        for code, count in zip(codes, counts):
+            first, second = products[int(code) // PAIR_BASE], products[int(code) % PAIR_BASE]
+            neighbors.setdefault(first, {})[second] = int(count)
+            neighbors.setdefault(second, {})[first] = int(count)
+        return neighbors
+
+    def generate_recommendations(self, workers=1):
+        """Generate product recommendations based on previous purchases.
+
+        With workers > 1 (or None for one per CPU) the pair counting runs in a
+        process pool; the resulting index is identical to the single-process one.
+        """
+        if workers is None or workers > 1:
+            self.recommendations = self.build_index(self.count_pairs_parallel(workers or os.cpu_count()))
+            self.save_data(self.recommendations_file, self.recommendations)
+            print("Product recommendations generated successfully!")
+            return
+
+        neighbors = {}
         for order in self.orders:
             items = list(order["items"].keys())
             for i in range(len(items)):
                 for j in range(i + 1, len(items)):
-                    pair = tuple(sorted([items[i], items[j]]))
-                    product_pairs[pair] = product_pairs.get(pair, 0) + 1
-        
-        self.recommendations = {str(k): v for k, v in sorted(product_pairs.items(), key=lambda x: x[1], reverse=True)}
+                    first, second = items[i], items[j]
+                    partners = neighbors.setdefault(first, {})
+                    partners[second] = partners.get(second, 0) + 1
+                    partners = neighbors.setdefault(second, {})
+                    partners[first] = partners.get(first, 0) + 1
+
+        self.recommendations = self.build_index(neighbors)
         self.save_data(self.recommendations_file, self.recommendations)
         print("Product recommendations generated successfully!")
 
-    def suggest_products(self, purchased_item):
-        """Suggest related products based on previous purchases."""
-        suggestions = []
-        for pair, count in self.recommendations.items():
-            pair_items = eval(pair)
-            if purchased_item in pair_items:
-                suggestions.append(pair_items[1] if pair_items[0] == purchased_item else pair_items[0])
-        return suggestions[:3]
+    def bump_partner(self, product, partner):
+        """Add one co-purchase of partner to product and fix its top list in place."""
+        entry = self.recommendations.setdefault(product, {"neighbors": {}, "top": []})
+        count = entry["neighbors"].get(partner, 0) + 1
+        entry["neighbors"][partner] = count
+        top = entry["top"]
+        for position, (name, _) in enumerate(top):
+            if name == partner:
+                del top[position]
+                break
+        # Counts only grow, so the partner can only move up; insert it at its rank.
+        position = len(top)
+        while position > 0 and (top[position - 1][1], partner) < (count, top[position - 1][0]):
+            position -= 1
+        top.insert(position, [partner, count])
+        del top[self.top_k:]
+
+    def record_order(self, items):
+        """Fold the item pairs of one newly placed order into the live index."""
+        products = list(items)
+        for i in range(len(products)):
+            for j in range(i + 1, len(products)):
+                self.bump_partner(products[i], products[j])
+                self.bump_partner(products[j], products[i])
+        if len(products) > 1:
+            self.save_data(self.recommendations_file, self.recommendations, "set", products)
+
+    def suggest_products(self, purchased_item, limit=3):
+        """Suggest the products most often bought together with purchased_item."""
+        entry = self.recommendations.get(purchased_item)
+        if entry is None:
+            return []
+        return [partner for partner, count in entry["top"][:limit]]
 
     def run(self):
         """Main function to handle product recommendations."""
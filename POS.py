@@ -1,28 +1,117 @@
 import json
 import datetime
+import os
+import threading
+import uuid
+from JournalStore import JournalStore, sync_directory
+from SharedInventory import SharedInventory
 
 class POS:
-    def __init__(self, inventory_file="inventory.json", sales_file="sales.json"):
+    def __init__(self, inventory_file="inventory.json", sales_file="sales.json", journal=False, storage=None,
+                 group_commit=False, batch_size=20, flush_interval=1.0, reorder_monitor=None, rollups=None,
+                 shared=False, linked_files=()):
         self.inventory_file = inventory_file
         self.sales_file = sales_file
+        self.journal = journal
+        self.storage = storage
+        self.shared = shared
+        self.stores = {}
+        self.batch_storage = None
+        self.reorder_monitor = reorder_monitor
+        self.rollups = rollups
+        self.group_commit = group_commit
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.checkout_log = sales_file + ".checkouts"
+        self.pending_receipts = []
+        self.pending_barcodes = set()
+        self.lock = threading.RLock()
+        # Batches are numbered; durable_batch is the last one known to be on disk.
+        self.durable = threading.Condition()
+        self.open_batch = 0
+        self.durable_batch = -1
         self.inventory = self.load_data(self.inventory_file)
         self.sales = self.load_data(self.sales_file)
+        # Other files, such as orders, whose changes are persisted in the same
+        # checkout batches as the stock they move.
+        self.linked = {}
+        self.pending_linked = {}
+        for filename in linked_files:
+            self.link_file(filename)
+        if self.group_commit:
+            self.recover_checkouts()
+            self._stopped = threading.Event()
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
 
     def load_data(self, filename):
-        """Load data from a JSON file."""
+        """Load data from a JSON file, its journal, or the shared storage engine."""
+        default = {} if "inventory" in filename else []
+        if self.storage is not None and self.storage.has_table(filename):
+            storage = self.storage
+            if self.group_commit:
+                # Queued checkouts stay uncommitted until the batch is flushed, so
+                # they get a connection that no other writer can commit early.
+                if self.batch_storage is None:
+                    self.batch_storage = self.storage.session()
+                storage = self.batch_storage
+            self.stores[filename] = storage.table(filename)
+            return self.stores[filename].load()
+        if self.shared and filename == self.inventory_file:
+            # Other lanes update the same file; see SharedInventory.
+            self.stores[filename] = SharedInventory(filename)
+            return self.stores[filename].load()
+        if self.journal:
+            # In group-commit mode the journals are synced once per batch by
+            # flush_checkouts instead of once per write.
+            self.stores[filename] = JournalStore(filename, default, sync=not self.group_commit)
+            return self.stores[filename].load()
         try:
             with open(filename, 'r') as file:
                 return json.load(file)
         except (FileNotFoundError, json.JSONDecodeError):
-            return {} if "inventory" in filename else []
+            return default
 
-    def save_data(self, filename, data):
-        """Save data to a JSON file."""
-        with open(filename, 'w') as file:
+    def save_data(self, filename, data, op=None, keys=()):
+        """Save data to a JSON file, or journal only the changed records."""
+        store = self.stores.get(filename)
+        if store is not None:
+            if op is None:
+                store.save(data)
+            else:
+                store.record(data, op, keys)
+            return
+        temp_file = filename + ".tmp"
+        with open(temp_file, 'w') as file:
             json.dump(data, file, indent=4)
+            if self.group_commit:
+                # The checkout log is cleared after this, so the file must be on disk.
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(temp_file, filename)
+        if self.group_commit:
+            sync_directory(filename)
+
+    def link_file(self, filename):
+        """Load a file whose changes are written with the checkout batches."""
+        if filename not in self.linked:
+            self.linked[filename] = self.load_data(filename)
+            self.pending_linked[filename] = set()
+        return self.linked[filename]
+
+    def queue_changes(self, filename, keys):
+        """Add changed records of the inventory or a linked file to the next batch."""
+        with self.lock:
+            if filename == self.inventory_file:
+                self.pending_barcodes.update(keys)
+            else:
+                self.pending_linked[filename].update(keys)
 
     def scan_barcode(self, barcode):
         """Retrieve item details by barcode."""
+        store = self.stores.get(self.inventory_file)
+        if isinstance(store, SharedInventory):
+            store.refresh(self.inventory)
         return self.inventory.get(barcode, None)
 
     def process_payment(self, total_amount, payment_method):
@@ -38,21 +127,193 @@ class POS:
         receipt = {
             "date": str(datetime.datetime.now()),
             "items": cart,
+            "prices": {barcode: self.inventory[barcode]['price'] for barcode in cart if barcode in self.inventory},
             "total": total_amount,
             "payment_method": payment_method
         }
-        self.sales.append(receipt)
-        self.save_data(self.sales_file, self.sales)
+        if self.group_commit:
+            receipt["receipt_id"] = uuid.uuid4().hex
+            self.sales.append(receipt)
+            self.pending_receipts.append(len(self.sales) - 1)
+        else:
+            self.sales.append(receipt)
+            self.save_data(self.sales_file, self.sales, "append")
+        if self.rollups is not None:
+            lines = [(barcode, quantity, receipt["prices"][barcode])
+                     for barcode, quantity in cart.items() if barcode in receipt["prices"]]
+            self.rollups.record(receipt["date"], lines)
         print("Receipt Generated:", json.dumps(receipt, indent=4))
 
     def update_inventory(self, cart):
-        """Update inventory based on the purchased items."""
+        """Update inventory based on the purchased items; returns False if any item was short.
+
+        A shared inventory is adjusted atomically, so a short item leaves the
+        whole cart unapplied.
+        """
+        store = self.stores.get(self.inventory_file)
+        if isinstance(store, SharedInventory):
+            updated, rejected = store.adjust(self.inventory, {barcode: -quantity for barcode, quantity in cart.items()},
+                                             atomic=True)
+            for barcode in rejected:
+                print(f"Error: Insufficient stock for {barcode}.")
+            if self.reorder_monitor is not None:
+                for barcode in updated:
+                    self.reorder_monitor.stock_changed(barcode, self.inventory[barcode])
+            return not rejected
+        updated = []
         for barcode, quantity in cart.items():
             if barcode in self.inventory and self.inventory[barcode]['quantity'] >= quantity:
                 self.inventory[barcode]['quantity'] -= quantity
+                updated.append(barcode)
+                if self.reorder_monitor is not None:
+                    self.reorder_monitor.stock_changed(barcode, self.inventory[barcode])
             else:
                 print(f"Error: Insufficient stock for {barcode}.")
-        self.save_data(self.inventory_file, self.inventory)
+        if self.group_commit:
+            self.pending_barcodes.update(updated)
+        else:
+            self.save_data(self.inventory_file, self.inventory, "set", updated)
+        return len(updated) == len(cart)
+
+    def checkout(self, cart, total_amount, payment_method):
+        """Record the receipt and stock decrement for a paid cart; returns False if it was refused.
+
+        With a shared inventory another lane may have sold the stock since
+        the cart was scanned, so the stock is taken first and no receipt is
+        written unless the whole cart was available.
+        """
+        with self.lock:
+            if isinstance(self.stores.get(self.inventory_file), SharedInventory):
+                if not self.update_inventory(cart):
+                    print("Checkout cancelled; no items were sold.")
+                    return False
+                self.generate_receipt(cart, total_amount, payment_method)
+            else:
+                self.generate_receipt(cart, total_amount, payment_method)
+                self.update_inventory(cart)
+            if self.group_commit and len(self.pending_receipts) >= self.batch_size:
+                self.flush_checkouts()
+            return True
+
+    def flush_checkouts(self):
+        """Persist all queued checkouts together with a single durable write."""
+        with self.lock:
+            if not self.pending_receipts and not self.pending_barcodes and not any(self.pending_linked.values()):
+                return
+            batch_number = self.open_batch
+            self.open_batch += 1
+            receipts = self.pending_receipts
+            barcodes = sorted(self.pending_barcodes)
+            linked = {filename: sorted(keys) for filename, keys in self.pending_linked.items() if keys}
+            self.pending_receipts = []
+            self.pending_barcodes = set()
+            self.pending_linked = {filename: set() for filename in self.linked}
+            if self.batch_storage is not None:
+                # Both tables share the batch connection, so one commit covers
+                # exactly this batch.
+                sales_store = self.stores[self.sales_file]
+                inventory_store = self.stores[self.inventory_file]
+                sales_store.stage(self.sales, "set", receipts)
+                inventory_store.stage(self.inventory, "set", barcodes)
+                for filename, keys in linked.items():
+                    self.stores[filename].stage(self.linked[filename], "set", keys)
+                sales_store.commit()
+                inventory_store.commit()
+                for filename in linked:
+                    self.stores[filename].commit()
+                self.mark_durable(batch_number)
+                return
+            batch = {
+                "receipts": [self.sales[index] for index in receipts],
+                "inventory": {barcode: self.inventory[barcode] for barcode in barcodes}
+            }
+            if linked:
+                batch["linked"] = {filename: [[key, self.linked[filename][key]] for key in keys]
+                                   for filename, keys in linked.items()}
+            created = not os.path.exists(self.checkout_log)
+            with open(self.checkout_log, 'a') as file:
+                file.write(json.dumps(batch) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            if created:
+                sync_directory(self.checkout_log)
+            self.save_data(self.sales_file, self.sales, "set", receipts)
+            self.save_data(self.inventory_file, self.inventory, "set", barcodes)
+            for filename, keys in linked.items():
+                self.save_data(filename, self.linked[filename], "set", keys)
+            for filename in [self.sales_file, self.inventory_file, *linked]:
+                store = self.stores.get(filename)
+                if isinstance(store, JournalStore):
+                    store.flush()
+            # Only now are the files durable, so the logged batch can go.
+            open(self.checkout_log, 'w').close()
+            self.mark_durable(batch_number)
+
+    def mark_durable(self, batch_number):
+        """Record that a batch is on disk and wake the callers waiting for it."""
+        with self.durable:
+            self.durable_batch = batch_number
+            self.durable.notify_all()
+
+    def wait_durable(self, batch_number, timeout=30.0):
+        """Block until the given batch has been flushed; returns False on timeout.
+
+        Changes queued while open_batch was batch_number are in that batch.
+        Call this after releasing self.lock, so the flush can take it.
+        """
+        with self.durable:
+            return self.durable.wait_for(lambda: self.durable_batch >= batch_number, timeout)
+
+    def recover_checkouts(self):
+        """Re-apply batches from the checkout log that a crash left unsaved."""
+        try:
+            with open(self.checkout_log, 'r') as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+        batches = []
+        for line in lines:
+            try:
+                batches.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+        if not batches:
+            return
+        recorded = {sale.get("receipt_id") for sale in self.sales}
+        for batch in batches:
+            for receipt in batch["receipts"]:
+                if receipt["receipt_id"] not in recorded:
+                    self.sales.append(receipt)
+                    self.pending_receipts.append(len(self.sales) - 1)
+            for barcode, details in batch["inventory"].items():
+                self.inventory[barcode] = details
+                self.pending_barcodes.add(barcode)
+            for filename, records in batch.get("linked", {}).items():
+                data = self.link_file(filename)
+                for key, record in records:
+                    if isinstance(data, list) and key == len(data):
+                        data.append(record)
+                    else:
+                        data[key] = record
+                    self.pending_linked[filename].add(key)
+        self.flush_checkouts()
+        print(f"Recovered {len(batches)} unsaved checkout batch(es).")
+
+    def _flush_loop(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush_checkouts()
+
+    def close(self):
+        """Stop the background flusher, persist queued checkouts and compact journals."""
+        if self.group_commit:
+            self._stopped.set()
+            self._flusher.join()
+        self.flush_checkouts()
+        for store in self.stores.values():
+            if isinstance(store, (JournalStore, SharedInventory)):
+                store.close()
+        if self.batch_storage is not None:
+            self.batch_storage.close()
 
     def run(self):
         """Main function to handle POS transactions."""
@@ -72,9 +333,9 @@ class POS:
         print(f"Total amount: ${total_amount:.2f}")
         payment_method = input("Enter payment method (cash/credit card): ")
         if self.process_payment(total_amount, payment_method):
-            self.generate_receipt(cart, total_amount, payment_method)
-            self.update_inventory(cart)
+            self.checkout(cart, total_amount, payment_method)
 
 if __name__ == "__main__":
     pos_system = POS()
-    pos_system.run()
\ No newline at end of file
+    pos_system.run()
+    pos_system.close()
\ No newline at end of file
@@ -0,0 +1,48 @@
+import bisect
+
+
+class ReorderMonitor:
+    """Track which items are at or below their reorder level as stock moves.
+
+    The inventory is scanned once when the monitor is created. After that the
+    classes that change stock report each touched item through stock_changed,
+    so the set of items needing a reorder never requires a full scan.
+    Subscribers are called with (item, details) the moment an item crosses
+    down to its reorder level. The alerts are kept sorted by shortfall as
+    they change, so listing them never sorts the whole set.
+    """
+
+    def __init__(self, inventory=None):
+        self.below = {}
+        self.ordered = []
+        self.subscribers = []
+        for item, details in (inventory or {}).items():
+            self.stock_changed(item, details, notify=False)
+
+    def subscribe(self, callback):
+        """Register callback(item, details) for items that newly need reordering."""
+        self.subscribers.append(callback)
+
+    def stock_changed(self, item, details, notify=True):
+        """Update the tracked state of one item after its stock changed."""
+        reorder_level = details.get("reorder_level") if details else None
+        previous = self.below.pop(item, None)
+        if previous is not None:
+            quantity, level = previous
+            del self.ordered[bisect.bisect_left(self.ordered, (quantity - level, item))]
+        if reorder_level is None or details["quantity"] > reorder_level:
+            return
+        crossed = previous is None
+        self.below[item] = (details["quantity"], reorder_level)
+        bisect.insort(self.ordered, (details["quantity"] - reorder_level, item))
+        if crossed and notify:
+            for callback in self.subscribers:
+                callback(item, details)
+
+    def alerts(self, limit=None):
+        """Return up to limit (item, quantity, shortfall) tuples, furthest below the reorder level first."""
+        alerts = []
+        for _, item in self.ordered[:limit]:
+            quantity, level = self.below[item]
+            alerts.append((item, quantity, level - quantity))
+        return alerts
@@ -0,0 +1,296 @@
+import json
+import os
+import sqlite3
+import sys
+from collections.abc import MutableMapping, MutableSequence
+
+# Each table keeps the full record as JSON plus a few real columns that are
+# indexed or queried directly. Mapping tables are keyed like the JSON dicts
+# they replace; list tables keep the original position in "seq".
+TABLES = {
+    "inventory": {
+        "kind": "mapping",
+        "key": ("barcode", "TEXT"),
+        "columns": {"name": "TEXT", "price": "REAL", "quantity": "INTEGER", "reorder_level": "INTEGER"},
+        "indexes": [],
+    },
+    "orders": {
+        "kind": "list",
+        "key": ("order_id", "INTEGER"),
+        "columns": {"customer": "TEXT", "total_price": "REAL", "status": "TEXT", "date": "TEXT"},
+        "indexes": ["status"],
+    },
+    "shipments": {
+        "kind": "list",
+        "key": ("tracking_id", "TEXT"),
+        "columns": {"supplier": "TEXT", "status": "TEXT", "estimated_arrival": "TEXT"},
+        "indexes": ["status", "supplier"],
+    },
+    "sales": {
+        "kind": "list",
+        "key": None,
+        "columns": {"date": "TEXT", "product": "TEXT", "quantity": "INTEGER", "price": "REAL", "total": "REAL"},
+        "indexes": ["date", "product"],
+    },
+}
+
+
+def table_name(filename):
+    """Map a JSON data file such as "inventory.json" to its table name."""
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+class SQLiteTable:
+    """Common row access for a table view; subclasses provide the container protocol."""
+
+    def __init__(self, connection, name):
+        self.connection = connection
+        self.name = name
+        spec = TABLES[name]
+        self.key_column = spec["key"][0] if spec["key"] else None
+        self.columns = list(spec["columns"])
+        self._cache = {}
+
+    def _values(self, record):
+        return [record.get(column) if isinstance(record, dict) else None for column in self.columns]
+
+    def _upsert(self, id_column, id_value, record, extra=()):
+        columns = [id_column, *[column for column, _ in extra], *self.columns, "record"]
+        values = [id_value, *[value for _, value in extra], *self._values(record), json.dumps(record)]
+        placeholders = ", ".join("?" for _ in columns)
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO {self.name} ({', '.join(columns)}) VALUES ({placeholders})", values
+        )
+
+    def load(self):
+        """Return the live view; rows are fetched on demand."""
+        return self
+
+    def commit(self):
+        """Commit pending writes and release cached rows."""
+        self.connection.commit()
+        self._cache.clear()
+
+    def record(self, data, op, keys=()):
+        """Persist the changed rows and commit."""
+        self.stage(data, op, keys)
+        self.commit()
+
+
+class SQLiteMapping(SQLiteTable, MutableMapping):
+    """Dict-like view of a keyed table with O(log n) point lookups."""
+
+    def __getitem__(self, key):
+        if key not in self._cache:
+            row = self.connection.execute(
+                f"SELECT record FROM {self.name} WHERE {self.key_column} = ?", (key,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(key)
+            self._cache[key] = json.loads(row[0])
+        return self._cache[key]
+
+    def __setitem__(self, key, value):
+        self._cache[key] = value
+        self._upsert(self.key_column, key, value)
+
+    def __delitem__(self, key):
+        cursor = self.connection.execute(f"DELETE FROM {self.name} WHERE {self.key_column} = ?", (key,))
+        self._cache.pop(key, None)
+        if not cursor.rowcount:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._cache:
+            return True
+        return self.connection.execute(
+            f"SELECT 1 FROM {self.name} WHERE {self.key_column} = ?", (key,)
+        ).fetchone() is not None
+
+    def __iter__(self):
+        rows = self.connection.execute(f"SELECT {self.key_column} FROM {self.name}").fetchall()
+        return (row[0] for row in rows)
+
+    def __len__(self):
+        return self.connection.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+    def items(self):
+        """Yield (key, record) pairs with a single table scan."""
+        for key, record in self.connection.execute(f"SELECT {self.key_column}, record FROM {self.name}").fetchall():
+            if key not in self._cache:
+                self._cache[key] = json.loads(record)
+            yield key, self._cache[key]
+
+    def values(self):
+        return (record for _, record in self.items())
+
+    def stage(self, data, op, keys=()):
+        """Write the rows named by keys without committing."""
+        if op == "set":
+            for key in keys:
+                self._upsert(self.key_column, key, self[key])
+
+    def save(self, data):
+        """Persist every cached row, or replace the table with a plain dict."""
+        if data is self:
+            for key, value in self._cache.items():
+                self._upsert(self.key_column, key, value)
+        else:
+            self.connection.execute(f"DELETE FROM {self.name}")
+            for key, value in data.items():
+                self._upsert(self.key_column, key, value)
+        self.commit()
+
+
+class SQLiteList(SQLiteTable, MutableSequence):
+    """List-like view of a table ordered by original position."""
+
+    def _position(self, index):
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("list index out of range")
+        return index
+
+    def _write(self, index, value):
+        extra = [(self.key_column, value.get(self.key_column))] if self.key_column else []
+        self._upsert("seq", index, value, extra)
+
+    def __getitem__(self, index):
+        index = self._position(index)
+        if index not in self._cache:
+            row = self.connection.execute(f"SELECT record FROM {self.name} WHERE seq = ?", (index,)).fetchone()
+            self._cache[index] = json.loads(row[0])
+        return self._cache[index]
+
+    def __setitem__(self, index, value):
+        index = self._position(index)
+        self._cache[index] = value
+        self._write(index, value)
+
+    def __delitem__(self, index):
+        raise TypeError(f"Rows of the {self.name} table cannot be removed by position.")
+
+    def __len__(self):
+        return self.connection.execute(f"SELECT COALESCE(MAX(seq) + 1, 0) FROM {self.name}").fetchone()[0]
+
+    def __iter__(self):
+        for index, record in self.connection.execute(f"SELECT seq, record FROM {self.name} ORDER BY seq").fetchall():
+            if index not in self._cache:
+                self._cache[index] = json.loads(record)
+            yield self._cache[index]
+
+    def insert(self, index, value):
+        length = len(self)
+        if index != length:
+            raise TypeError(f"Rows can only be appended to the {self.name} table.")
+        self._cache[length] = value
+        self._write(length, value)
+
+    def index_of(self, key):
+        """Return the position of the row whose key column equals key, or None."""
+        row = self.connection.execute(
+            f"SELECT seq FROM {self.name} WHERE {self.key_column} = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def max_key(self):
+        """Return the largest value in the key column, or None for an empty table."""
+        return self.connection.execute(f"SELECT MAX({self.key_column}) FROM {self.name}").fetchone()[0]
+
+    def where(self, column, value):
+        """Return the rows whose indexed column equals value."""
+        rows = self.connection.execute(
+            f"SELECT record FROM {self.name} WHERE {column} = ? ORDER BY seq", (value,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def stage(self, data, op, keys=()):
+        """Write the appended or updated rows without committing."""
+        if op == "append":
+            self._write(len(self) - 1, self[-1])
+        elif op == "set":
+            for index in keys:
+                self._write(index, self[index])
+
+    def save(self, data):
+        """Persist every cached row, or replace the table with a plain list."""
+        if data is self:
+            for index, value in self._cache.items():
+                self._write(index, value)
+        else:
+            self.connection.execute(f"DELETE FROM {self.name}")
+            for index, value in enumerate(data):
+                self._write(index, value)
+        self.commit()
+
+
+class SQLiteStore:
+    """Shared SQLite database holding the tables behind the JSON data files."""
+
+    def __init__(self, path="store.db"):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.tables = {}
+        self.create_tables()
+
+    def create_tables(self):
+        """Create tables and indexes that do not exist yet."""
+        for name, spec in TABLES.items():
+            if spec["kind"] == "mapping":
+                definition = [f"{spec['key'][0]} {spec['key'][1]} PRIMARY KEY"]
+            else:
+                definition = ["seq INTEGER PRIMARY KEY"]
+                if spec["key"]:
+                    definition.append(f"{spec['key'][0]} {spec['key'][1]}")
+            definition += [f"{column} {kind}" for column, kind in spec["columns"].items()]
+            definition.append("record TEXT NOT NULL")
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS {name} ({', '.join(definition)})")
+            indexes = list(spec["indexes"])
+            if spec["kind"] == "list" and spec["key"]:
+                indexes.insert(0, spec["key"][0])
+            for column in indexes:
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_{column} ON {name} ({column})")
+        self.connection.commit()
+
+    def session(self):
+        """Open the same database on a separate connection, so its writes commit on their own."""
+        return SQLiteStore(self.path)
+
+    def has_table(self, filename):
+        """Return True if the data file has a table in this store."""
+        return table_name(filename) in TABLES
+
+    def table(self, filename):
+        """Return the shared view of the table backing a JSON data file."""
+        name = table_name(filename)
+        if name not in self.tables:
+            view = SQLiteMapping if TABLES[name]["kind"] == "mapping" else SQLiteList
+            self.tables[name] = view(self.connection, name)
+        return self.tables[name]
+
+    def close(self):
+        self.connection.close()
+
+
+def migrate_json(store, directory="."):
+    """Copy every existing JSON data file in directory into the store's tables."""
+    for name, spec in TABLES.items():
+        filename = os.path.join(directory, f"{name}.json")
+        try:
+            with open(filename, 'r') as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+        if spec["kind"] == "mapping" and isinstance(data, list):
+            data = {record[spec["key"][0]]: record for record in data}
+        store.table(filename).save(data)
+        print(f"Migrated {len(data)} records from {filename}.")
+
+
+if __name__ == "__main__":
+    database = sys.argv[1] if len(sys.argv) > 1 else "store.db"
+    directory = sys.argv[2] if len(sys.argv) > 2 else "."
+    migrate_json(SQLiteStore(database), directory)
@@ -1,78 +1,376 @@
+import datetime
+import heapq
 import json
-import matplotlib.pyplot as plt
+import os
+import statistics
+import sys
+from array import array
 from collections import Counter
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from JournalStore import JournalStore
+from JsonLines import open_records
+from SalesRollups import SalesRollups, period_start
+
+_numpy = False
+
+
+def load_numpy():
+    """Import NumPy on first use and cache it; returns None when it is not installed."""
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+def sale_lines(sales, inventory=None):
+    """Yield (product, quantity, price) for sale rows and for each line of POS receipts.
+
+    POS receipts store the unit prices charged; older receipts without them are
+    priced from the inventory.
+    """
+    for sale in sales:
+        if "product" in sale:
+            yield sale["product"], sale["quantity"], sale["price"]
+            continue
+        prices = sale.get("prices", {})
+        for product, quantity in sale.get("items", {}).items():
+            if product in prices:
+                yield product, quantity, prices[product]
+                continue
+            details = (inventory or {}).get(product) or {}
+            yield product, quantity, details.get("price", 0.0)
+
+
+class SalesColumns:
+    """Columnar copy of the sales history used by the reports.
+
+    Products are stored once and referenced by integer code; codes, quantities
+    and prices live in compact typed arrays. When NumPy is installed the
+    reports run as vectorized reductions over zero-copy views of those arrays.
+    """
+
+    def __init__(self):
+        self.products = []
+        self.product_codes = {}
+        self.codes = array('q')
+        self.quantity = array('q')
+        self.price = array('d')
+
+    @classmethod
+    def from_sales(cls, sales, inventory=None):
+        """Build columns from sale rows or POS receipts."""
+        columns = cls()
+        for product, quantity, price in sale_lines(sales, inventory):
+            columns.append(product, quantity, price)
+        return columns
+
+    def append(self, product, quantity, price):
+        code = self.product_codes.get(product)
+        if code is None:
+            code = self.product_codes[product] = len(self.products)
+            self.products.append(product)
+        self.codes.append(code)
+        self.quantity.append(quantity)
+        self.price.append(price)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def revenue(self):
+        """Total of quantity x price over all sales."""
+        np = load_numpy()
+        if np is not None:
+            return float(np.dot(np.frombuffer(self.quantity, dtype=np.int64), np.frombuffer(self.price)))
+        return sum(quantity * price for quantity, price in zip(self.quantity, self.price))
+
+    def units_by_product(self):
+        """Units sold per product code."""
+        np = load_numpy()
+        if np is not None:
+            units = np.bincount(np.frombuffer(self.codes, dtype=np.int64),
+                                weights=np.frombuffer(self.quantity, dtype=np.int64),
+                                minlength=len(self.products))
+            return units.astype(np.int64)
+        units = [0] * len(self.products)
+        for code, quantity in zip(self.codes, self.quantity):
+            units[code] += quantity
+        return units
+
+    def top_products(self, count):
+        """Return (product, units) for the count best sellers by units sold."""
+        units = self.units_by_product()
+        np = load_numpy()
+        if np is not None:
+            order = np.argsort(-units, kind="stable")[:count]
+        else:
+            order = heapq.nlargest(count, range(len(units)), key=lambda code: (units[code], -code))
+        return [(self.products[code], int(units[code])) for code in order]
+
+    def price_stats(self):
+        """Minimum, maximum, mean and median unit price."""
+        np = load_numpy()
+        if np is not None:
+            prices = np.frombuffer(self.price)
+            return {"min": float(prices.min()), "max": float(prices.max()),
+                    "mean": float(prices.mean()), "median": float(np.median(prices))}
+        return {"min": min(self.price), "max": max(self.price),
+                "mean": statistics.fmean(self.price), "median": statistics.median(self.price)}
+
+
+class SalesSummary:
+    """Single-pass aggregate of a sales stream with the same report methods as SalesColumns.
+
+    Only per-product totals and a count of each distinct unit price are kept,
+    so memory depends on the catalog size rather than on the number of sales.
+    """
+
+    def __init__(self):
+        self.products = []
+        self.product_codes = {}
+        self.units = []
+        self.total_revenue = 0.0
+        self.price_counts = Counter()
+        self.count = 0
+
+    @classmethod
+    def from_sales(cls, sales, inventory=None):
+        """Aggregate sale rows or POS receipts from any iterable, one at a time."""
+        summary = cls()
+        for product, quantity, price in sale_lines(sales, inventory):
+            summary.append(product, quantity, price)
+        return summary
+
+    def append(self, product, quantity, price):
+        code = self.product_codes.get(product)
+        if code is None:
+            code = self.product_codes[product] = len(self.products)
+            self.products.append(product)
+            self.units.append(0)
+        self.units[code] += quantity
+        self.total_revenue += quantity * price
+        self.price_counts[price] += 1
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def revenue(self):
+        return self.total_revenue
+
+    def units_by_product(self):
+        return self.units
+
+    def top_products(self, count):
+        order = heapq.nlargest(count, range(len(self.units)), key=lambda code: (self.units[code], -code))
+        return [(self.products[code], self.units[code]) for code in order]
+
+    def price_stats(self):
+        prices = sorted(self.price_counts)
+        middle = {(self.count - 1) // 2, self.count // 2}
+        found = []
+        seen = 0
+        for price in prices:
+            following = seen + self.price_counts[price]
+            found += [price for position in sorted(middle) if seen <= position < following]
+            seen = following
+        total = sum(price * count for price, count in self.price_counts.items())
+        return {"min": prices[0], "max": prices[-1], "mean": total / self.count, "median": sum(found) / len(found)}
+
+
 class SalesAnalytics:
-    def __init__(self, sales_file="sales.json", inventory_file="inventory.json"):
+    def __init__(self, sales_file="sales.json", inventory_file="inventory.json", journal=False, storage=None, streaming=False, rollups=None):
         self.sales_file = sales_file
         self.inventory_file = inventory_file
+        self.journal = journal
+        self.storage = storage
+        self.streaming = streaming
+        self.rollups = rollups
+        self.rollups_checked = False
+        self.stores = {}
+        self.columns = None
         self.sales = self.load_data(self.sales_file)
         self.inventory = self.load_data(self.inventory_file)
 
     def load_data(self, filename):
-        """Load data from a JSON file."""
+        """Load data from a JSON file, its journal, or the shared storage engine."""
+        default = [] if "sales" in filename else {}
+        if self.streaming and "sales" in filename:
+            # Sales are read one record at a time, from a JSON array or a line-delimited file.
+            self.stores[filename] = open_records(filename)
+            return self.stores[filename].load()
+        if self.storage is not None and self.storage.has_table(filename):
+            self.stores[filename] = self.storage.table(filename)
+            return self.stores[filename].load()
+        if self.journal:
+            self.stores[filename] = JournalStore(filename, default)
+            return self.stores[filename].load()
         try:
             with open(filename, 'r') as file:
                 return json.load(file)
         except (FileNotFoundError, json.JSONDecodeError):
-            return [] if "sales" in filename else {}
+            return default
 
-    def save_data(self, filename, data):
-        """Save data to a JSON file."""
+    def save_data(self, filename, data, op=None, keys=()):
+        """Save data to a JSON file, or journal only the changed records."""
+        store = self.stores.get(filename)
+        if store is not None:
+            if op is None:
+                store.save(data)
+            else:
+                store.record(data, op, keys)
+            return
         with open(filename, 'w') as file:
             json.dump(data, file, indent=4)
 
+    def get_columns(self):
+        """Return the columnar sales data, building it on first use.
+
+        In streaming mode the sales file is aggregated in one bounded-memory pass instead.
+        """
+        if self.streaming:
+            return SalesSummary.from_sales(self.sales, self.inventory)
+        if self.columns is None:
+            self.columns = SalesColumns.from_sales(self.sales, self.inventory)
+        return self.columns
+
+    def get_rollups(self):
+        """Return the hourly/daily rollups, rebuilt from the sales history if they are behind it.
+
+        Any writer that appended sales without feeding the rollups (another
+        session, or a POS without rollups) leaves their sales count short of
+        the sales file, which triggers the rebuild.
+        """
+        if self.rollups is None:
+            self.rollups = SalesRollups()
+        if not self.rollups_checked:
+            if self.rollups.sales_count() != len(self.sales):
+                self.rollups.rebuild(self.sales, self.inventory)
+            self.rollups_checked = True
+        return self.rollups
+
     def record_sale(self, product, quantity, price):
         """Record a new sale and update inventory."""
         if product in self.inventory and self.inventory[product]['quantity'] >= quantity:
-            self.sales.append({"product": product, "quantity": quantity, "price": price})
+            rollups = self.get_rollups()
+            sale = {"product": product, "quantity": quantity, "price": price, "date": str(datetime.datetime.now())}
+            self.sales.append(sale)
             self.inventory[product]['quantity'] -= quantity
-            self.save_data(self.sales_file, self.sales)
-            self.save_data(self.inventory_file, self.inventory)
+            self.save_data(self.sales_file, self.sales, "append")
+            self.save_data(self.inventory_file, self.inventory, "set", [product])
+            if self.columns is not None:
+                self.columns.append(product, quantity, price)
+            rollups.record(sale["date"], [(product, quantity, price)])
             print(f"Sale recorded: {quantity} x {product} at ${price} each.")
         else:
             print("Error: Insufficient stock or product not found.")
 
-    def generate_sales_report(self):
+    def generate_period_report(self, period, top_n=5):
+        """Generate a sales report for "today", "week" or "month" from the rollups."""
+        totals = self.get_rollups().totals(period_start(period))
+        if not totals:
+            print(f"No sales data available for this {period}.")
+            return
+        total_revenue = sum(revenue for units, revenue in totals.values())
+        top_products = heapq.nlargest(top_n, totals.items(), key=lambda pair: pair[1][0])
+
+        print(f"\nSales Report ({period}):")
+        print(f"Total Revenue: ${total_revenue:.2f}")
+        print(f"Best-Selling Product: {top_products[0][0]} (Sold {top_products[0][1][0]} units)")
+        print(f"Top {len(top_products)} Products:")
+        for rank, (product, (units, revenue)) in enumerate(top_products, start=1):
+            print(f"  {rank}. {product} - {units} units, ${revenue:.2f}")
+
+    def generate_sales_report(self, top_n=5, period=None):
         """Generate a sales report including total revenue and best-selling products."""
-        if not self.sales:
+        if period is not None:
+            self.generate_period_report(period, top_n)
+            return
+        columns = self.get_columns()
+        if not len(columns):
             print("No sales data available.")
             return
 
-        total_revenue = sum(sale['quantity'] * sale['price'] for sale in self.sales)
-        product_counts = Counter(sale['product'] for sale in self.sales)
-        best_selling = product_counts.most_common(1)[0] if product_counts else (None, 0)
+        total_revenue = columns.revenue()
+        top_products = columns.top_products(top_n)
+        prices = columns.price_stats()
 
         print("\nSales Report:")
         print(f"Total Revenue: ${total_revenue:.2f}")
-        print(f"Best-Selling Product: {best_selling[0]} (Sold {best_selling[1]} times)")
+        print(f"Best-Selling Product: {top_products[0][0]} (Sold {top_products[0][1]} units)")
+        print(f"Top {len(top_products)} Products:")
+        for rank, (product, units) in enumerate(top_products, start=1):
+            print(f"  {rank}. {product} - {units} units")
+        print(f"Unit Price: min ${prices['min']:.2f}, max ${prices['max']:.2f}, "
+              f"mean ${prices['mean']:.2f}, median ${prices['median']:.2f}")
 
-    def visualize_sales(self):
-        """Generate a bar chart visualization of sales data."""
-        if not self.sales:
+    def visualize_sales(self, output=None, top_n=None):
+        """Generate a bar chart visualization of sales data.
+
+        With output set to a .png or .svg path the chart is rendered to that file
+        with the non-interactive Agg backend, limited to the top_n (default 20)
+        best sellers. matplotlib is only imported when a chart is requested.
+        """
+        columns = self.get_columns()
+        if not len(columns):
             print("No sales data to visualize.")
             return
 
-        product_counts = Counter(sale['product'] for sale in self.sales)
-        products, quantities = zip(*product_counts.items())
+        import matplotlib
+        if output is not None:
+            matplotlib.use("Agg")
+            top_n = top_n or 20
+        import matplotlib.pyplot as plt
+
+        if top_n:
+            products, quantities = zip(*columns.top_products(top_n))
+        else:
+            products = columns.products
+            quantities = [int(units) for units in columns.units_by_product()]
 
-        plt.bar(products, quantities, color='blue')
-        plt.xlabel("Products")
-        plt.ylabel("Quantity Sold")
-        plt.title("Sales Data Visualization")
-        plt.xticks(rotation=45)
-        plt.show()
+        fig, ax = plt.subplots(figsize=(max(6, len(products) * 0.4), 5))
+        ax.bar(products, quantities, color='blue')
+        ax.set_xlabel("Products")
+        ax.set_ylabel("Quantity Sold")
+        ax.set_title("Sales Data Visualization")
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+        if output is None:
+            plt.show()
+        else:
+            fig.savefig(output)
+            print(f"Chart saved to {output}.")
+        plt.close(fig)
 
-    def inventory_turnover_report(self):
-        """Analyze inventory turnover and stock levels."""
-        print("\nInventory Turnover Report:")
+    def inventory_turnover_report(self, period=None):
+        """Analyze inventory turnover and stock levels, optionally over a recent period."""
+        if period is None:
+            print("\nInventory Turnover Report:")
+            for product, details in self.inventory.items():
+                print(f"{product}: {details['quantity']} remaining in stock")
+            return
+        totals = self.get_rollups().totals(period_start(period))
+        print(f"\nInventory Turnover Report ({period}):")
         for product, details in self.inventory.items():
-            print(f"{product}: {details['quantity']} remaining in stock")
+            sold = totals.get(product, [0, 0.0])[0]
+            stocked = sold + details['quantity']
+            turnover = sold / stocked if stocked else 0.0
+            print(f"{product}: {details['quantity']} remaining in stock, {sold} sold, turnover {turnover:.0%}")
 
 
 def main():
     analytics = SalesAnalytics()
 
+    if len(sys.argv) > 2 and sys.argv[1] == "--chart":
+        # Batch mode for headless servers: render each requested file and exit.
+        for output in sys.argv[2:]:
+            analytics.visualize_sales(output=output)
+        return
+
     while True:
         print("\nSales Analytics and Reporting Tool")
         print("1. Record Sale")
@@ -91,11 +389,20 @@ def main():
             except ValueError:
                 print("Invalid input. Please enter valid numbers for quantity and price.")
         elif choice == '2':
-            analytics.generate_sales_report()
+            period = input("Report period (all, today, week, month): ").strip().lower()
+            if period in ("today", "week", "month"):
+                analytics.generate_sales_report(period=period)
+            else:
+                analytics.generate_sales_report()
         elif choice == '3':
-            analytics.visualize_sales()
+            output = input("Save chart to file (.png/.svg, blank to display): ").strip()
+            analytics.visualize_sales(output=output or None)
         elif choice == '4':
-            analytics.inventory_turnover_report()
+            period = input("Report period (all, today, week, month): ").strip().lower()
+            if period in ("today", "week", "month"):
+                analytics.inventory_turnover_report(period)
+            else:
+                analytics.inventory_turnover_report()
         elif choice == '5':
             print("Exiting...")
             break
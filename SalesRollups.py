@@ -0,0 +1,106 @@
+import datetime
+from JournalStore import JournalStore
+
+
+class SalesRollups:
+    """Units and revenue per product, pre-aggregated by hour and by day.
+
+    Buckets are keyed "hour:YYYY-MM-DDTHH" and "day:YYYY-MM-DD" and each maps
+    product -> [units, revenue]. Recording a sale touches exactly two buckets,
+    which are journaled rather than rewriting the file. A date-range query reads
+    whole days where it can and hourly buckets only at the ragged ends.
+
+    The "sales_count" entry counts the sale rows folded in, so a reader can
+    tell when some writer appended sales without updating the rollups.
+    """
+
+    def __init__(self, filename="sales_rollups.json"):
+        self.filename = filename
+        self.store = JournalStore(filename, {}, sync=False)
+        self.buckets = self.store.load()
+
+    @staticmethod
+    def bucket_keys(timestamp):
+        return f"hour:{timestamp:%Y-%m-%dT%H}", f"day:{timestamp:%Y-%m-%d}"
+
+    def record(self, timestamp, lines):
+        """Add (product, quantity, price) lines sold at timestamp to their buckets."""
+        if isinstance(timestamp, str):
+            timestamp = datetime.datetime.fromisoformat(timestamp)
+        keys = self.bucket_keys(timestamp)
+        self._add(keys, lines)
+        self.buckets["sales_count"] = self.sales_count() + 1
+        self.store.record(self.buckets, "set", keys + ("sales_count",))
+
+    def sales_count(self):
+        """Return how many sale rows the rollups include."""
+        return self.buckets.get("sales_count", 0)
+
+    def _add(self, keys, lines):
+        for key in keys:
+            bucket = self.buckets.setdefault(key, {})
+            for product, quantity, price in lines:
+                totals = bucket.setdefault(product, [0, 0.0])
+                totals[0] += quantity
+                totals[1] += quantity * price
+
+    def rebuild(self, sales, inventory=None):
+        """Recompute every bucket from raw sale rows or POS receipts that carry a date.
+
+        POS receipts store the unit prices charged; older receipts without them are
+        priced from the inventory.
+        """
+        self.buckets.clear()
+        count = 0
+        for sale in sales:
+            count += 1
+            if "date" not in sale:
+                continue
+            timestamp = datetime.datetime.fromisoformat(sale["date"])
+            if "product" in sale:
+                lines = [(sale["product"], sale["quantity"], sale["price"])]
+            else:
+                prices = sale.get("prices", {})
+                lines = [(product, quantity, prices[product] if product in prices
+                          else ((inventory or {}).get(product) or {}).get("price", 0.0))
+                         for product, quantity in sale.get("items", {}).items()]
+            self._add(self.bucket_keys(timestamp), lines)
+        self.buckets["sales_count"] = count
+        self.store.save(self.buckets)
+
+    def totals(self, start, end=None):
+        """Return product -> [units, revenue] for sales from start's hour up to end."""
+        end = end or datetime.datetime.now()
+        cursor = start.replace(minute=0, second=0, microsecond=0)
+        keys = []
+        while cursor < end:
+            next_day = (cursor + datetime.timedelta(days=1)).replace(hour=0)
+            if cursor.hour == 0 and next_day <= end:
+                keys.append(f"day:{cursor:%Y-%m-%d}")
+                cursor = next_day
+            else:
+                keys.append(f"hour:{cursor:%Y-%m-%dT%H}")
+                cursor += datetime.timedelta(hours=1)
+        result = {}
+        for key in keys:
+            for product, (units, revenue) in self.buckets.get(key, {}).items():
+                totals = result.setdefault(product, [0, 0.0])
+                totals[0] += units
+                totals[1] += revenue
+        return result
+
+    def close(self):
+        self.store.close()
+
+
+def period_start(period, now=None):
+    """Return the start of a named reporting period: "today", "week" (last 7 days) or "month"."""
+    now = now or datetime.datetime.now()
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "today":
+        return midnight
+    if period == "week":
+        return now - datetime.timedelta(days=7)
+    if period == "month":
+        return midnight.replace(day=1)
+    raise ValueError(f"Unknown period: {period}")
@@ -0,0 +1,200 @@
+import heapq
+import re
+from collections import Counter
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens, plus the joined digits of numbers like phone numbers."""
+    tokens = re.findall(r"[a-z0-9]+", str(text).lower())
+    digits = "".join(token for token in tokens if token.isdigit())
+    if digits and digits not in tokens:
+        tokens.append(digits)
+    return tokens
+
+
+def edit_distance(first, second, limit):
+    """Return the edit distance between two strings, counting a swap of adjacent letters as one edit.
+
+    Stops early and returns limit + 1 once the distance is known to exceed limit.
+    """
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    previous_row = None
+    row = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        earlier_row, previous_row = previous_row, row
+        row = [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = first[i - 1] != second[j - 1]
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if (i > 1 and j > 1 and first[i - 1] == second[j - 2]
+                    and first[i - 2] == second[j - 1]):
+                row[j] = min(row[j], earlier_row[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+    return row[-1]
+
+
+class SearchIndex:
+    """In-memory ranked search over short text fields such as names and contact details.
+
+    Every distinct token is stored once in a character trie for prefix matches
+    and under its n-grams, which find substrings by intersecting postings and
+    typo candidates by merging them; token_keys
+    maps each token back to the records that contain it. Records are added and
+    removed one at a time, so the index never has to be rebuilt.
+    """
+
+    EXACT_SCORE = 3.0
+    PREFIX_SCORE = 2.0
+    SUBSTRING_SCORE = 1.0
+
+    def __init__(self, ngram=3, max_completions=50, max_candidates=1000):
+        self.ngram = ngram
+        self.max_completions = max_completions
+        self.max_candidates = max_candidates
+        self.trie = {}
+        self.token_keys = {}
+        self.gram_tokens = {}
+        self.key_tokens = {}
+
+    def grams(self, token):
+        padded = f"#{token}#"
+        return {padded[start:start + self.ngram] for start in range(max(1, len(padded) - self.ngram + 1))}
+
+    def add(self, key, *texts):
+        """Index a record under the tokens of each text, replacing any earlier entry."""
+        if key in self.key_tokens:
+            self.remove(key)
+        tokens = {token for text in texts if text for token in tokenize(text)}
+        self.key_tokens[key] = tokens
+        for token in tokens:
+            if token not in self.token_keys:
+                self.token_keys[token] = set()
+                node = self.trie
+                for char in token:
+                    node = node.setdefault(char, {})
+                node[None] = True
+                for gram in self.grams(token):
+                    self.gram_tokens.setdefault(gram, set()).add(token)
+            self.token_keys[token].add(key)
+
+    def remove(self, key):
+        """Drop a record from the index; tokens no other record uses are forgotten."""
+        for token in self.key_tokens.pop(key, ()):
+            keys = self.token_keys[token]
+            keys.discard(key)
+            if keys:
+                continue
+            del self.token_keys[token]
+            self.prune(token)
+            for gram in self.grams(token):
+                postings = self.gram_tokens[gram]
+                postings.discard(token)
+                if not postings:
+                    del self.gram_tokens[gram]
+
+    def prune(self, token):
+        """Unmark token in the trie and drop the nodes left with no tokens below them."""
+        path = [self.trie]
+        for char in token:
+            path.append(path[-1][char])
+        path[-1].pop(None, None)
+        for depth in range(len(token), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][token[depth - 1]]
+
+    def completions(self, prefix):
+        """Yield indexed tokens starting with prefix, shortest first, up to max_completions.
+
+        Each level of the walk keeps at most 32 * max_completions branches, so
+        a one-letter prefix does not visit the whole subtrie below it.
+        """
+        node = self.trie
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return
+        level = [(prefix, node)]
+        found = 0
+        width = 32 * self.max_completions
+        while level and found < self.max_completions:
+            next_level = []
+            for text, node in level:
+                for char, child in node.items():
+                    if char is None:
+                        yield text
+                        found += 1
+                        if found >= self.max_completions:
+                            return
+                    elif len(next_level) < width:
+                        next_level.append((text + char, child))
+            level = next_level
+
+    def substring_tokens(self, query_token):
+        """Return indexed tokens containing query_token, found by intersecting n-gram postings."""
+        grams = {query_token[start:start + self.ngram] for start in range(len(query_token) - self.ngram + 1)}
+        postings = sorted((self.gram_tokens.get(gram, set()) for gram in grams), key=len)
+        if not postings or not postings[0]:
+            return []
+        candidates = postings[0].intersection(*postings[1:])
+        return [token for token in candidates if query_token in token]
+
+    def similar_tokens(self, query_token):
+        """Return (token, distance) for tokens within one typo, or two for long words."""
+        limit = 1 if len(query_token) < 8 else 2
+        candidates = set()
+        for gram in self.grams(query_token):
+            candidates.update(self.gram_tokens.get(gram, ()))
+        similar = []
+        for token in candidates:
+            distance = edit_distance(query_token, token, limit)
+            if distance <= limit:
+                similar.append((token, distance))
+        return similar
+
+    def match_token(self, query_token):
+        """Return {token: score} for indexed tokens matching one query token.
+
+        Exact tokens score highest, then tokens the query is a prefix of, then
+        tokens containing it. Only when none of those exist are near misses
+        from a typo considered.
+        """
+        matches = {}
+        for token in self.completions(query_token):
+            if token == query_token:
+                matches[token] = self.EXACT_SCORE
+            else:
+                matches[token] = self.PREFIX_SCORE + len(query_token) / len(token)
+        if len(matches) < self.max_completions and len(query_token) >= self.ngram:
+            for token in self.substring_tokens(query_token):
+                matches.setdefault(token, self.SUBSTRING_SCORE + len(query_token) / len(token))
+        if not matches and len(query_token) > self.ngram and not query_token.isdigit():
+            for token, distance in self.similar_tokens(query_token):
+                matches[token] = 1 - distance / len(query_token)
+        return matches
+
+    def search(self, query, limit=10):
+        """Return up to limit (key, score) pairs, best match first.
+
+        Each query token scores a record by its best match: exact token,
+        then prefix, then n-gram similarity. Records matching more of the
+        query tokens rank higher. Matching tokens are visited best score first
+        and each query token stops after max_candidates records, so a short
+        query such as "a" does not score every record in the index.
+        """
+        scores = Counter()
+        for query_token in set(tokenize(query)):
+            best = {}
+            matches = sorted(self.match_token(query_token).items(), key=lambda item: -item[1])
+            for token, score in matches:
+                if len(best) >= self.max_candidates:
+                    break
+                for key in self.token_keys[token]:
+                    if key not in best:
+                        best[key] = score
+                        if len(best) >= self.max_candidates:
+                            break
+            scores.update(best)
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], str(item[0])))
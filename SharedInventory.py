@@ -0,0 +1,285 @@
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class SharedInventory:
+    """Inventory file that several processes on one host can update safely.
+
+    The snapshot in <filename> is followed by a change log, <filename>.log,
+    that every process appends to. Each line replaces or deletes one record.
+    Each record carries a "version" number that is bumped on every write.
+    Readers catch up by reading only the log lines added since their last
+    look, under a shared advisory lock on <filename>.lock. Writers hold the
+    exclusive lock. Where flock is unavailable every access is exclusive,
+    through a <filename>.excl file created with O_EXCL.
+
+    Stock changes go through adjust(), which is optimistic. New quantities
+    are computed from the local copy and committed only if none of the
+    touched records changed version in the meantime. Otherwise the copy is
+    refreshed and the change retried. The final attempt runs entirely under
+    the exclusive lock, so it always succeeds.
+    """
+
+    def __init__(self, filename, compact_threshold=5000, max_retries=5, sync=True, lock_timeout=10.0):
+        self.filename = filename
+        self.log_file = filename + ".log"
+        self.lock_file = filename + ".lock"
+        self.lock_timeout = lock_timeout
+        self.compact_threshold = compact_threshold
+        self.max_retries = max_retries
+        self.sync = sync
+        self.thread_lock = threading.RLock()
+        self.snapshot_id = None
+        self.log_id = None
+        self.offset = 0
+        self.log_lines = 0
+        self.conflicts = 0
+
+    @contextmanager
+    def locked(self, exclusive):
+        """Hold the advisory lock shared by every process using this inventory.
+
+        Without flock a RuntimeError is raised if the lock file cannot be
+        created within lock_timeout seconds, so the log is never written
+        unlocked.
+        """
+        with self.thread_lock:
+            if fcntl is not None:
+                with open(self.lock_file, 'a') as file:
+                    fcntl.flock(file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                    try:
+                        yield
+                    finally:
+                        fcntl.flock(file, fcntl.LOCK_UN)
+                return
+            lock_file = self.filename + ".excl"
+            deadline = time.monotonic() + self.lock_timeout
+            while True:
+                try:
+                    descriptor = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    break
+                except FileExistsError:
+                    if time.monotonic() >= deadline:
+                        raise RuntimeError(f"Could not lock {self.filename}; remove {lock_file} if no process is using it.")
+                    time.sleep(0.01)
+            try:
+                yield
+            finally:
+                os.close(descriptor)
+                os.remove(lock_file)
+
+    def _fingerprint(self, filename):
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            return None
+        return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    def _read_snapshot(self):
+        try:
+            with open(self.filename, 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _reset_log(self):
+        """Start an empty log bound to the snapshot currently on disk (exclusive lock held)."""
+        temp_file = self.log_file + ".tmp"
+        header = json.dumps({"snapshot": self._fingerprint(self.filename)}) + "\n"
+        with open(temp_file, 'w') as file:
+            file.write(header)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file, self.log_file)
+        self.snapshot_id = self._fingerprint(self.filename)
+        self.log_id = os.stat(self.log_file).st_ino
+        self.offset = len(header)
+        self.log_lines = 0
+
+    @staticmethod
+    def apply(data, change):
+        if change.get("deleted"):
+            data.pop(change["key"], None)
+        else:
+            data[change["key"]] = change["value"]
+
+    def _catch_up(self, data, exclusive=False):
+        """Apply changes other processes logged since the last look; returns the changed keys.
+
+        Returns None after a full reload, which happens when another process
+        compacted the log into a new snapshot.
+        """
+        try:
+            stat = os.stat(self.log_file)
+        except FileNotFoundError:
+            stat = None
+        if stat is not None and stat.st_ino == self.log_id and stat.st_size == self.offset:
+            return set()
+        changed = set()
+        with open(self.log_file, 'a+') as file:
+            file.seek(0)
+            try:
+                header = json.loads(file.readline())
+            except json.JSONDecodeError:
+                header = {}
+            if stat is None or header.get("snapshot") != self.snapshot_id or stat.st_ino != self.log_id:
+                snapshot = self._read_snapshot()
+                data.clear()
+                data.update(snapshot)
+                changed = None
+                if header.get("snapshot") != self._fingerprint(self.filename):
+                    # No log for this snapshot yet; only a writer may create one.
+                    if exclusive:
+                        self._reset_log()
+                    else:
+                        self.snapshot_id = self._fingerprint(self.filename)
+                        self.log_id, self.offset, self.log_lines = None, 0, 0
+                    return changed
+                self.snapshot_id = header["snapshot"]
+                self.log_id = stat.st_ino
+                self.offset = file.tell()
+                self.log_lines = 0
+            file.seek(self.offset)
+            while True:
+                line = file.readline()
+                if not line:
+                    break
+                try:
+                    change = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line torn by a crash mid-write; a writer drops it before appending.
+                    if exclusive:
+                        file.truncate(self.offset)
+                    break
+                self.apply(data, change)
+                if changed is not None:
+                    changed.add(change["key"])
+                self.offset += len(line)
+                self.log_lines += 1
+        return changed
+
+    def load(self):
+        """Load the snapshot and replay the shared change log."""
+        data = {}
+        with self.locked(exclusive=True):
+            self._catch_up(data, exclusive=True)
+        return data
+
+    def refresh(self, data):
+        """Bring data up to date with changes made by other processes; returns the changed keys."""
+        with self.locked(exclusive=False):
+            return self._catch_up(data)
+
+    def _append(self, data, records, deleted=()):
+        """Version and log records while holding the exclusive lock."""
+        lines = []
+        for key, record in records.items():
+            current = data.get(key) or {}
+            record["version"] = current.get("version", 0) + 1
+            lines.append(json.dumps({"key": key, "value": record}) + "\n")
+        lines += [json.dumps({"key": key, "deleted": True}) + "\n" for key in deleted]
+        if not lines:
+            return
+        text = "".join(lines)
+        with open(self.log_file, 'a') as file:
+            file.write(text)
+            file.flush()
+            if self.sync:
+                os.fsync(file.fileno())
+        self.offset += len(text)
+        self.log_lines += len(lines)
+        for key, record in records.items():
+            data[key] = record
+        for key in deleted:
+            data.pop(key, None)
+        if self.log_lines >= self.compact_threshold:
+            self._write_snapshot(data)
+
+    def _write_snapshot(self, data):
+        temp_file = self.filename + ".tmp"
+        with open(temp_file, 'w') as file:
+            json.dump(data, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file, self.filename)
+        self._reset_log()
+
+    def _plan(self, data, deltas, atomic, default):
+        """Compute new records for quantity deltas from the local copy."""
+        records = {}
+        rejected = []
+        for key, delta in deltas.items():
+            current = data.get(key)
+            if current is None and default is None:
+                rejected.append(key)
+                continue
+            record = dict(current if current is not None else default)
+            record["quantity"] = record.get("quantity", 0) + delta
+            if record["quantity"] < 0:
+                rejected.append(key)
+                continue
+            records[key] = record
+        if atomic and rejected:
+            records = {}
+        expected = {key: (data.get(key) or {}).get("version", 0) for key in records}
+        return records, expected, rejected
+
+    def adjust(self, data, deltas, atomic=False, default=None):
+        """Apply quantity deltas with compare-and-swap on each record's version.
+
+        Keys that are unknown (and have no default record) or would go below
+        zero are rejected; with atomic=True any rejection cancels the whole
+        change. Returns (applied_keys, rejected_keys).
+        """
+        for attempt in range(self.max_retries):
+            with self.locked(exclusive=False):
+                self._catch_up(data)
+                records, expected, rejected = self._plan(data, deltas, atomic, default)
+            with self.locked(exclusive=True):
+                self._catch_up(data, exclusive=True)
+                if all((data.get(key) or {}).get("version", 0) == version for key, version in expected.items()):
+                    self._append(data, records)
+                    return list(records), rejected
+            self.conflicts += 1
+            time.sleep(random.uniform(0, 0.002 * (attempt + 1)))
+        with self.locked(exclusive=True):
+            self._catch_up(data, exclusive=True)
+            records, _, rejected = self._plan(data, deltas, atomic, default)
+            self._append(data, records)
+            return list(records), rejected
+
+    def record(self, data, op, keys=()):
+        """Log records changed in place by the caller, bumping their versions.
+
+        These writes replace the whole record, so use adjust() for stock
+        changes that must not lose a concurrent update.
+        """
+        if op not in ("set", "delete"):
+            raise TypeError(f"{self.filename} only supports setting and deleting records.")
+        with self.locked(exclusive=True):
+            local = {key: data[key] for key in keys} if op == "set" else {}
+            self._catch_up(data, exclusive=True)
+            self._append(data, local, list(keys) if op == "delete" else ())
+
+    def save(self, data):
+        """Replace the snapshot with data and start a new log."""
+        with self.locked(exclusive=True):
+            self._write_snapshot(data)
+
+    def close(self):
+        """Fold the change log into the snapshot."""
+        with self.locked(exclusive=True):
+            if self.log_lines:
+                data = {}
+                self.log_id = None
+                self._catch_up(data, exclusive=True)
+                self._write_snapshot(data)
@@ -1,25 +1,39 @@
 import json
 import datetime
+from JournalStore import JournalStore
 
 class StoreMaintenanceSystem:
-    def __init__(self, maintenance_file="maintenance.json", assets_file="assets.json", requests_file="requests.json"):
+    def __init__(self, maintenance_file="maintenance.json", assets_file="assets.json", requests_file="requests.json", journal=False):
         self.maintenance_file = maintenance_file
         self.assets_file = assets_file
         self.requests_file = requests_file
+        self.journal = journal
+        self.stores = {}
         self.maintenance_schedule = self.load_data(self.maintenance_file)
         self.assets = self.load_data(self.assets_file)
         self.service_requests = self.load_data(self.requests_file)
 
     def load_data(self, filename):
-        """Load data from a JSON file."""
+        """Load data from a JSON file, replaying its journal if journaling is on."""
+        default = []
+        if self.journal:
+            self.stores[filename] = JournalStore(filename, default)
+            return self.stores[filename].load()
         try:
             with open(filename, 'r') as file:
                 return json.load(file)
         except (FileNotFoundError, json.JSONDecodeError):
-            return []
+            return default
 
-    def save_data(self, filename, data):
-        """Save data to a JSON file."""
+    def save_data(self, filename, data, op=None, keys=()):
+        """Save data to a JSON file, or journal only the changed records."""
+        store = self.stores.get(filename)
+        if store is not None:
+            if op is None:
+                store.save(data)
+            else:
+                store.record(data, op, keys)
+            return
         with open(filename, 'w') as file:
             json.dump(data, file, indent=4)
 
@@ -32,7 +46,7 @@ class StoreMaintenanceSystem:
             "status": "Scheduled"
         }
         self.maintenance_schedule.append(task_entry)
-        self.save_data(self.maintenance_file, self.maintenance_schedule)
+        self.save_data(self.maintenance_file, self.maintenance_schedule, "append")
         print(f"Maintenance task '{task}' scheduled successfully!")
 
     def list_maintenance(self):
@@ -49,7 +63,7 @@ class StoreMaintenanceSystem:
             "condition": condition
         }
         self.assets.append(asset)
-        self.save_data(self.assets_file, self.assets)
+        self.save_data(self.assets_file, self.assets, "append")
         print(f"Asset '{name}' added successfully!")
 
     def list_assets(self):
@@ -67,7 +81,7 @@ class StoreMaintenanceSystem:
             "status": "Pending"
         }
         self.service_requests.append(request)
-        self.save_data(self.requests_file, self.service_requests)
+        self.save_data(self.requests_file, self.service_requests, "append")
         print(f"Service request for '{issue}' submitted successfully!")
 
     def list_requests(self):
@@ -0,0 +1,243 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+from InventoryManagement import OrderManagementSystem
+from POS import POS
+from ReorderMonitor import ReorderMonitor
+
+
+class POSBatchStore:
+    """Store for one of the order system's files that defers writes to the POS checkout batch.
+
+    The order system and the POS then share one in-memory inventory and
+    orders list. An order and its stock decrement are written in the same
+    checkout log line, so neither is ever persisted without the other.
+    """
+
+    def __init__(self, pos, filename):
+        self.pos = pos
+        self.filename = filename
+
+    def load(self):
+        if self.filename == self.pos.inventory_file:
+            return self.pos.inventory
+        return self.pos.link_file(self.filename)
+
+    def record(self, data, op, keys=()):
+        if op == "append":
+            keys = [len(data) - 1]
+        elif op != "set":
+            raise TypeError(f"{self.filename} only supports appending and setting records.")
+        self.pos.queue_changes(self.filename, keys)
+
+    def save(self, data):
+        with self.pos.lock:
+            self.pos.queue_changes(self.filename, data.keys() if isinstance(data, dict) else range(len(data)))
+            self.pos.flush_checkouts()
+
+
+class ThreadOutput(io.TextIOBase):
+    """Stand-in for sys.stdout that sends prints from a capturing thread to that thread's buffer."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    @contextlib.contextmanager
+    def capture(self):
+        self.local.buffer = io.StringIO()
+        try:
+            yield self.local.buffer
+        finally:
+            self.local.buffer = None
+
+
+class StoreService:
+    """Serve POS and order operations to many terminals from one process.
+
+    Requests and responses are JSON objects, one per line, over a Unix socket
+    or TCP. Each request names an "op" (scan_barcode, checkout, place_order,
+    track_order or reorder_alerts) and may carry an "id" that is echoed back.
+    Requests run in a thread pool against a single in-memory copy of the
+    data, so a handler waiting on a flush never blocks the event loop.
+    Changes are made under the POS lock. The POS group commit persists
+    checkouts, orders and their stock changes in batches from its
+    background thread. checkout and place_order answer only after their
+    batch is durable, waiting outside the lock so that batches keep filling.
+    """
+
+    def __init__(self, journal=True, storage=None, batch_size=200, flush_interval=0.2):
+        self.pos = POS(journal=journal, storage=storage, group_commit=True,
+                       batch_size=batch_size, flush_interval=flush_interval)
+        self.reorder_monitor = ReorderMonitor(self.pos.inventory)
+        self.pos.reorder_monitor = self.reorder_monitor
+        self.orders = OrderManagementSystem(reorder_monitor=self.reorder_monitor,
+                                            inventory_store=POSBatchStore(self.pos, self.pos.inventory_file),
+                                            orders_store=POSBatchStore(self.pos, "orders.json"),
+                                            order_id_block=1000)
+        # Handlers report problems by printing; each thread captures its own output.
+        if not isinstance(sys.stdout, ThreadOutput):
+            sys.stdout = ThreadOutput(sys.stdout)
+        self.output = sys.stdout
+        self.handlers = {
+            "scan_barcode": self.scan_barcode,
+            "checkout": self.checkout,
+            "place_order": self.place_order,
+            "track_order": self.track_order,
+            "reorder_alerts": self.reorder_alerts,
+        }
+
+    def scan_barcode(self, request):
+        item = self.pos.scan_barcode(request["barcode"])
+        if item is None:
+            raise LookupError("Item not found.")
+        return dict(item)
+
+    def check_stock(self, cart):
+        """Reject a cart up front so the classes never apply part of it."""
+        if not isinstance(cart, dict) or not cart:
+            raise ValueError("Expected a non-empty mapping of barcode to quantity.")
+        for barcode, quantity in cart.items():
+            item = self.pos.inventory.get(barcode)
+            if item is None:
+                raise LookupError(f"Item {barcode} not found.")
+            if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity <= 0:
+                raise ValueError(f"Invalid quantity for {barcode}.")
+            if item["quantity"] < quantity:
+                raise ValueError(f"Insufficient stock for {barcode}.")
+
+    def checkout(self, request):
+        cart = request["cart"]
+        payment_method = request.get("payment_method", "cash")
+        with self.pos.lock:
+            self.check_stock(cart)
+            total_amount = sum(self.pos.inventory[barcode]['price'] * quantity for barcode, quantity in cart.items())
+            if not self.pos.process_payment(total_amount, payment_method):
+                raise ValueError("Invalid payment method.")
+            batch_number = self.pos.open_batch
+            if not self.pos.checkout(cart, total_amount, payment_method):
+                raise ValueError("Insufficient stock.")
+            receipt = self.pos.sales[-1]
+        self.wait_durable(batch_number)
+        return receipt
+
+    def place_order(self, request):
+        with self.pos.lock:
+            self.check_stock(request["items"])
+            batch_number = self.pos.open_batch
+            count = len(self.orders.orders)
+            self.orders.place_order(request["customer"], request["items"])
+            if len(self.orders.orders) == count:
+                raise ValueError("Order could not be placed.")
+            order = self.orders.orders[-1]
+        self.wait_durable(batch_number)
+        return order
+
+    def wait_durable(self, batch_number):
+        """Answer only once the change is on disk, as group commit promises."""
+        if not self.pos.wait_durable(batch_number):
+            raise RuntimeError("The change was not saved in time.")
+
+    def track_order(self, request):
+        index = self.orders.find_order(request["order_id"])
+        if index is None:
+            raise LookupError("Order not found.")
+        return dict(self.orders.orders[index])
+
+    def reorder_alerts(self, request):
+        with self.pos.lock:
+            return self.reorder_monitor.alerts(request.get("limit"))
+
+    def handle(self, request):
+        """Run one request and build its response.
+
+        The classes report problems by printing, so their output is captured
+        and returned with a failed request.
+        """
+        response = {"id": request.get("id")} if isinstance(request, dict) else {"id": None}
+        with self.output.capture() as output:
+            try:
+                handler = self.handlers.get(request.get("op")) if isinstance(request, dict) else None
+                if handler is None:
+                    raise ValueError("Unknown operation.")
+                response["result"] = handler(request)
+                response["ok"] = True
+            except KeyError as error:
+                response["ok"] = False
+                response["error"] = f"Missing field {error}."
+            except (LookupError, TypeError, ValueError) as error:
+                response["ok"] = False
+                response["error"] = str(error)
+            except Exception as error:
+                response["ok"] = False
+                response["error"] = f"Internal error: {error!r}"
+        messages = output.getvalue().strip()
+        if messages and not response["ok"]:
+            response["messages"] = messages.splitlines()
+        return response
+
+    async def serve_client(self, reader, writer):
+        """Answer requests from one connection in order until it closes."""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError:
+                    response = {"id": None, "ok": False, "error": "Invalid JSON."}
+                else:
+                    response = await loop.run_in_executor(None, self.handle, request)
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path=None, host="127.0.0.1", port=8765, backlog=1024):
+        """Listen on a Unix socket if socket_path is given, otherwise on host:port.
+
+        The backlog is raised from asyncio's default of 100 so that a burst of
+        terminals connecting at once is queued rather than refused.
+        """
+        if socket_path:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(socket_path)
+            server = await asyncio.start_unix_server(self.serve_client, path=socket_path, backlog=backlog)
+            print(f"Store service listening on {socket_path}")
+        else:
+            server = await asyncio.start_server(self.serve_client, host, port, backlog=backlog)
+            print(f"Store service listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        """Persist queued checkouts and orders and compact journals."""
+        self.pos.close()
+
+
+if __name__ == "__main__":
+    service = StoreService()
+    try:
+        if len(sys.argv) > 1 and sys.argv[1].isdigit():
+            asyncio.run(service.serve(port=int(sys.argv[1])))
+        else:
+            asyncio.run(service.serve(socket_path=sys.argv[1] if len(sys.argv) > 1 else "store.sock"))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
@@ -1,51 +1,125 @@
 import json
 import datetime
+from JournalStore import JournalStore
+from SharedInventory import SharedInventory
+from ReorderMonitor import ReorderMonitor
 
 class SupplyChainManagementSystem:
-    def __init__(self, inventory_file="inventory.json", shipments_file="shipments.json", orders_file="orders.json"):
+    def __init__(self, inventory_file="inventory.json", shipments_file="shipments.json", orders_file="orders.json", journal=False, storage=None, reorder_monitor=None, shared=False):
         self.inventory_file = inventory_file
         self.shipments_file = shipments_file
         self.orders_file = orders_file
+        self.journal = journal
+        self.storage = storage
+        self.shared = shared
+        self.stores = {}
         self.inventory = self.load_data(self.inventory_file)
         self.shipments = self.load_data(self.shipments_file)
         self.orders = self.load_data(self.orders_file)
+        self.build_shipment_index()
+        self.reorder_monitor = reorder_monitor or ReorderMonitor(self.inventory)
 
     def load_data(self, filename):
-        """Load data from a JSON file."""
+        """Load data from a JSON file, its journal, or the shared storage engine."""
+        default = {} if "inventory" in filename else []
+        if self.storage is not None and self.storage.has_table(filename):
+            self.stores[filename] = self.storage.table(filename)
+            return self.stores[filename].load()
+        if self.shared and filename == self.inventory_file:
+            self.stores[filename] = SharedInventory(filename)
+            return self.stores[filename].load()
+        if self.journal:
+            self.stores[filename] = JournalStore(filename, default)
+            return self.stores[filename].load()
         try:
             with open(filename, 'r') as file:
                 return json.load(file)
         except (FileNotFoundError, json.JSONDecodeError):
-            return []
+            return default
 
-    def save_data(self, filename, data):
-        """Save data to a JSON file."""
+    def save_data(self, filename, data, op=None, keys=()):
+        """Save data to a JSON file, or journal only the changed records."""
+        store = self.stores.get(filename)
+        if store is not None:
+            if op is None:
+                store.save(data)
+            else:
+                store.record(data, op, keys)
+            return
         with open(filename, 'w') as file:
             json.dump(data, file, indent=4)
 
+    def build_shipment_index(self):
+        """Index shipment positions by tracking ID, status and supplier."""
+        if hasattr(self.shipments, "index_of"):
+            # The storage engine already indexes these columns.
+            self.shipment_index = None
+            return
+        self.shipment_index = {}
+        self.status_index = {}
+        self.supplier_index = {}
+        for index, shipment in enumerate(self.shipments):
+            self.index_shipment(index, shipment)
+
+    def index_shipment(self, index, shipment):
+        """Add one shipment position to the in-memory indexes."""
+        self.shipment_index.setdefault(shipment["tracking_id"], index)
+        self.status_index.setdefault(shipment["status"], set()).add(index)
+        self.supplier_index.setdefault(shipment["supplier"], set()).add(index)
+
+    def set_shipment_status(self, index, status):
+        """Change a shipment's status and move it between status index entries."""
+        shipment = self.shipments[index]
+        if self.shipment_index is not None:
+            self.status_index[shipment["status"]].discard(index)
+            self.status_index.setdefault(status, set()).add(index)
+        shipment["status"] = status
+
+    def find_shipment(self, tracking_id):
+        """Return the position of a shipment in self.shipments, or None if it does not exist."""
+        if self.shipment_index is None:
+            return self.shipments.index_of(tracking_id)
+        return self.shipment_index.get(tracking_id)
+
+    def shipments_by(self, field, value):
+        """Return the shipments whose status or supplier equals value."""
+        if self.shipment_index is None:
+            return self.shipments.where(field, value)
+        index = self.status_index if field == "status" else self.supplier_index
+        return [self.shipments[position] for position in sorted(index.get(value, ()))]
+
+    def list_shipments(self, field, value):
+        """Display the shipments with a given status or supplier."""
+        shipments = self.shipments_by(field, value)
+        if not shipments:
+            print("No matching shipments.")
+            return
+        for shipment in shipments:
+            print(f"{shipment['tracking_id']} - {shipment['supplier']} - {shipment['status']} (ETA {shipment['estimated_arrival']})")
+
     def track_shipment(self, tracking_id):
         """Retrieve and display shipment details."""
-        for shipment in self.shipments:
-            if shipment["tracking_id"] == tracking_id:
-                print("Shipment Details:", json.dumps(shipment, indent=4))
-                return
-        print("Shipment not found.")
+        index = self.find_shipment(tracking_id)
+        if index is None:
+            print("Shipment not found.")
+            return
+        print("Shipment Details:", json.dumps(self.shipments[index], indent=4))
 
     def reorder_alerts(self):
-        """Check inventory levels and generate reorder alerts."""
-        alerts = []
-        for item, details in self.inventory.items():
-            if details['quantity'] <= details['reorder_level']:
-                alerts.append(f"Reorder needed for {item}, current stock: {details['quantity']}")
+        """Display items at or below their reorder level, largest shortfall first."""
+        alerts = self.reorder_monitor.alerts()
         if alerts:
             print("Reorder Alerts:")
-            for alert in alerts:
-                print(alert)
+            for item, quantity, shortfall in alerts:
+                print(f"Reorder needed for {item}, current stock: {quantity}, short by {shortfall}")
         else:
             print("All inventory levels are sufficient.")
 
     def add_shipment(self, tracking_id, supplier, items, estimated_arrival):
         """Add a new shipment record."""
+        if self.find_shipment(tracking_id) is not None:
+            print(f"Shipment {tracking_id} already exists.")
+            return
         shipment = {
             "tracking_id": tracking_id,
             "supplier": supplier,
@@ -54,34 +128,51 @@ class SupplyChainManagementSystem:
             "status": "In Transit"
         }
         self.shipments.append(shipment)
-        self.save_data(self.shipments_file, self.shipments)
+        if self.shipment_index is not None:
+            self.index_shipment(len(self.shipments) - 1, shipment)
+        self.save_data(self.shipments_file, self.shipments, "append")
         print(f"Shipment {tracking_id} added successfully!")
 
     def update_inventory(self, tracking_id):
         """Update inventory based on received shipment."""
-        for shipment in self.shipments:
-            if shipment["tracking_id"] == tracking_id and shipment["status"] == "In Transit":
-                for item, quantity in shipment["items"].items():
-                    if item in self.inventory:
-                        self.inventory[item]["quantity"] += quantity
-                    else:
-                        self.inventory[item] = {"quantity": quantity, "reorder_level": 10}
-                shipment["status"] = "Received"
-                self.save_data(self.inventory_file, self.inventory)
-                self.save_data(self.shipments_file, self.shipments)
-                print(f"Inventory updated for shipment {tracking_id}.")
-                return
-        print("Shipment not found or already received.")
+        index = self.find_shipment(tracking_id)
+        if index is None or self.shipments[index]["status"] != "In Transit":
+            print("Shipment not found or already received.")
+            return
+        shipment = self.shipments[index]
+        store = self.stores.get(self.inventory_file)
+        if isinstance(store, SharedInventory):
+            store.adjust(self.inventory, shipment["items"], default={"quantity": 0, "reorder_level": 10})
+        else:
+            for item, quantity in shipment["items"].items():
+                if item in self.inventory:
+                    self.inventory[item]["quantity"] += quantity
+                else:
+                    self.inventory[item] = {"quantity": quantity, "reorder_level": 10}
+        for item in shipment["items"]:
+            self.reorder_monitor.stock_changed(item, self.inventory[item])
+        self.set_shipment_status(index, "Received")
+        if not isinstance(store, SharedInventory):
+            self.save_data(self.inventory_file, self.inventory, "set", shipment["items"])
+        self.save_data(self.shipments_file, self.shipments, "set", [index])
+        print(f"Inventory updated for shipment {tracking_id}.")
 
     def run(self):
         """Main function to handle supply chain interactions."""
         while True:
-            action = input("Choose an action: track_shipment, reorder_alerts, add_shipment, update_inventory, or quit: ")
+            action = input("Choose an action: track_shipment, list_shipments, reorder_alerts, add_shipment, update_inventory, or quit: ")
             if action == "quit":
                 break
             elif action == "track_shipment":
                 tracking_id = input("Enter tracking ID: ")
                 self.track_shipment(tracking_id)
+            elif action == "list_shipments":
+                field = input("List by status or supplier: ")
+                if field not in ("status", "supplier"):
+                    print("Invalid field.")
+                    continue
+                value = input(f"Enter {field}: ")
+                self.list_shipments(field, value)
             elif action == "reorder_alerts":
                 self.reorder_alerts()
             elif action == "add_shipment":
@@ -1,58 +1,156 @@
+import itertools
 import json
+from JournalStore import JournalStore
 
 class TaskManager:
-    def __init__(self, filename="tasks.json"):
+    def __init__(self, filename="tasks.json", journal=True):
         self.filename = filename
+        self.journal = journal
+        self.store = None
+        self.list_format = False
         self.tasks = self.load_tasks()
+        self.build_indexes()
 
     def load_tasks(self):
-        """Load tasks from a JSON file."""
-        try:
-            with open(self.filename, 'r') as file:
-                return json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
-
-    def save_tasks(self):
-        """Save tasks to a JSON file."""
+        """Load tasks keyed by ID from a JSON file, replaying its journal if journaling is on.
+
+        Loading never writes the file. An older file holding a plain list of
+        tasks is given IDs in memory and rewritten by the first change. A file
+        holding anything else raises ValueError and is left untouched, since
+        tasks.json is also the default file of EmployeePerformanceSystem.
+        """
+        if self.journal:
+            self.store = JournalStore(self.filename, {})
+            tasks = self.store.load()
+        else:
+            try:
+                with open(self.filename, 'r') as file:
+                    tasks = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                tasks = {}
+        if isinstance(tasks, list):
+            # Older files hold a plain list; give each task a stable ID.
+            tasks = {str(number): task for number, task in enumerate(tasks, start=1)}
+            self.list_format = True
+        if not isinstance(tasks, dict) or not all(isinstance(task, dict) and "title" in task
+                                                  for task in tasks.values()):
+            raise ValueError(f"{self.filename} does not hold TaskManager tasks; it was left unchanged.")
+        return tasks
+
+    def save_tasks(self, op=None, keys=()):
+        """Save tasks to a JSON file, or journal only the changed records."""
+        if self.list_format:
+            # The file is still a list, so the first change rewrites it whole.
+            op = None
+            self.list_format = False
+        if self.store is not None:
+            if op is None:
+                self.store.save(self.tasks)
+            else:
+                self.store.record(self.tasks, op, keys)
+            return
         with open(self.filename, 'w') as file:
             json.dump(self.tasks, file, indent=4)
 
+    def build_indexes(self):
+        """Index task IDs by title and split them into pending and completed sets."""
+        self.title_index = {}
+        self.pending = set()
+        self.completed = set()
+        for task_id, task in self.tasks.items():
+            self.index_task(task_id, task)
+        self.next_id = max((int(task_id) for task_id in self.tasks), default=0) + 1
+
+    def index_task(self, task_id, task):
+        self.title_index.setdefault(task["title"], set()).add(task_id)
+        (self.completed if task["completed"] else self.pending).add(task_id)
+
+    def unindex_task(self, task_id, task):
+        ids = self.title_index.get(task["title"], set())
+        ids.discard(task_id)
+        if not ids:
+            self.title_index.pop(task["title"], None)
+        self.pending.discard(task_id)
+        self.completed.discard(task_id)
+
     def add_task(self, title, description):
         """Add a new task."""
-        self.tasks.append({"title": title, "description": description, "completed": False})
-        self.save_tasks()
-        print(f"Task '{title}' added.")
+        task_id = str(self.next_id)
+        self.next_id += 1
+        self.tasks[task_id] = {"title": title, "description": description, "completed": False}
+        self.index_task(task_id, self.tasks[task_id])
+        self.save_tasks("set", [task_id])
+        print(f"Task '{title}' added with ID {task_id}.")
 
     def remove_task(self, title):
-        """Remove a task by title."""
-        self.tasks = [task for task in self.tasks if task['title'] != title]
-        self.save_tasks()
+        """Remove every task with the given title."""
+        removed = list(self.title_index.get(title, ()))
+        for task_id in removed:
+            self.unindex_task(task_id, self.tasks.pop(task_id))
+        if removed:
+            self.save_tasks("delete", removed)
         print(f"Task '{title}' removed.")
 
-    def display_tasks(self):
-        """Display all tasks."""
-        if not self.tasks:
-            print("No tasks available.")
+    def iter_tasks(self, status="all", query=None):
+        """Yield (task_id, task) in creation order, filtered by status and a title substring."""
+        if status == "pending":
+            wanted = self.pending
+        elif status == "done":
+            wanted = self.completed
         else:
-            print("\nTask List:")
-            for task in self.tasks:
-                status = "Done" if task["completed"] else "Pending"
-                print(f"{task['title']} - {task['description']} [{status}]")
+            wanted = None
+        query = query.lower() if query else None
+        for task_id, task in self.tasks.items():
+            if wanted is not None and task_id not in wanted:
+                continue
+            if query and query not in task["title"].lower():
+                continue
+            yield task_id, task
+
+    def display_tasks(self, status="all", query=None, page=1, page_size=20):
+        """Display one page of tasks; returns True if more pages follow."""
+        start = (page - 1) * page_size
+        shown = 0
+        more = False
+        for task_id, task in itertools.islice(self.iter_tasks(status, query), start, start + page_size + 1):
+            if shown == page_size:
+                more = True
+                break
+            if not shown:
+                print(f"\nTask List (page {page}):")
+            task_status = "Done" if task["completed"] else "Pending"
+            print(f"#{task_id} {task['title']} - {task['description']} [{task_status}]")
+            shown += 1
+        if not shown:
+            print("No tasks available.")
+        return more
 
     def mark_task_complete(self, title):
-        """Mark a task as completed."""
-        for task in self.tasks:
-            if task['title'] == title:
-                task['completed'] = True
-                self.save_tasks()
-                print(f"Task '{title}' marked as completed.")
-                return
-        print("Task not found.")
+        """Mark the oldest pending task with the given title as completed."""
+        ids = self.title_index.get(title)
+        if not ids:
+            print("Task not found.")
+            return
+        pending = ids & self.pending
+        task_id = min(pending or ids, key=int)
+        self.tasks[task_id]["completed"] = True
+        self.pending.discard(task_id)
+        self.completed.add(task_id)
+        self.save_tasks("set", [task_id])
+        print(f"Task '{title}' marked as completed.")
+
+    def close(self):
+        """Fold the journal into tasks.json."""
+        if self.store is not None:
+            self.store.close()
 
 
 def main():
-    manager = TaskManager()
+    try:
+        manager = TaskManager()
+    except ValueError as error:
+        print(f"Error: {error}")
+        return
 
     while True:
         print("\nTask Manager")
@@ -71,11 +169,18 @@ def main():
             title = input("Enter task title to remove: ")
             manager.remove_task(title)
         elif choice == '3':
-            manager.display_tasks()
+            status = input("Show all, pending or done tasks? (default all): ").strip().lower() or "all"
+            query = input("Filter by title (blank for none): ").strip()
+            page = 1
+            while manager.display_tasks(status, query, page):
+                if input("Press Enter for the next page or q to stop: ").strip().lower() == 'q':
+                    break
+                page += 1
         elif choice == '4':
             title = input("Enter task title to mark complete: ")
             manager.mark_task_complete(title)
         elif choice == '5':
+            manager.close()
             print("Exiting...")
             break
         else:
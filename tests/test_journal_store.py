@@ -0,0 +1,46 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from JournalStore import JournalStore
+
+
+class TornJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "data.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_torn_journal(self):
+        """Journal two changes, then leave a half-written third line as a crash would."""
+        store = JournalStore(self.filename, {}, compact_interval=3600)
+        data = store.load()
+        for key, value in (("a", 1), ("b", 2)):
+            data[key] = value
+            store.record(data, "set", [key])
+        with open(store.journal_file, 'a') as file:
+            file.write('[{"op": "set", "key": "x", "val')
+
+    def test_torn_line_is_dropped(self):
+        self.write_torn_journal()
+        self.assertEqual(JournalStore(self.filename, {}).load(), {"a": 1, "b": 2})
+
+    def test_writes_after_torn_line_survive(self):
+        self.write_torn_journal()
+        store = JournalStore(self.filename, {}, compact_interval=3600)
+        data = store.load()
+        data["c"] = 3
+        store.record(data, "set", ["c"])
+        self.assertEqual(JournalStore(self.filename, {}).load(), {"a": 1, "b": 2, "c": 3})
+        with open(self.filename, 'r') as file:
+            self.assertEqual(json.load(file), {"a": 1, "b": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from POS import POS
+
+
+class Crash(Exception):
+    pass
+
+
+class GroupCommitRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.inventory_file = os.path.join(self.directory.name, "inventory.json")
+        self.sales_file = os.path.join(self.directory.name, "sales.json")
+        with open(self.inventory_file, 'w') as file:
+            json.dump({"111": {"name": "cola", "price": 2.0, "quantity": 10}}, file)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open_pos(self):
+        return POS(self.inventory_file, self.sales_file, group_commit=True, flush_interval=3600)
+
+    def test_logged_batch_is_recovered_after_crash(self):
+        pos = self.open_pos()
+        pos.checkout({"111": 3}, 6.0, "cash")
+
+        def crash(*args, **kwargs):
+            raise Crash()
+
+        # The batch reaches the checkout log, then the process dies before
+        # the data files are written.
+        pos.save_data = crash
+        with self.assertRaises(Crash):
+            pos.flush_checkouts()
+        pos._stopped.set()
+        with open(self.inventory_file, 'r') as file:
+            self.assertEqual(json.load(file)["111"]["quantity"], 10)
+
+        recovered = self.open_pos()
+        recovered.close()
+        with open(self.inventory_file, 'r') as file:
+            self.assertEqual(json.load(file)["111"]["quantity"], 7)
+        with open(self.sales_file, 'r') as file:
+            sales = json.load(file)
+        self.assertEqual([sale["items"] for sale in sales], [{"111": 3}])
+        self.assertEqual(os.path.getsize(recovered.checkout_log), 0)
+
+    def test_recovery_does_not_duplicate_receipts(self):
+        pos = self.open_pos()
+        pos.checkout({"111": 2}, 4.0, "cash")
+        pos.flush_checkouts()
+        pos.close()
+        # A crash between saving the files and clearing the log replays a
+        # batch that is already in sales.json.
+        with open(self.sales_file, 'r') as file:
+            receipt = json.load(file)[0]
+        with open(pos.checkout_log, 'w') as file:
+            file.write(json.dumps({"receipts": [receipt], "inventory": {}}) + "\n")
+
+        self.open_pos().close()
+        with open(self.sales_file, 'r') as file:
+            self.assertEqual(len(json.load(file)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SharedInventory import SharedInventory
+
+WORKERS = 4
+SALES_PER_WORKER = 50
+STOCK = 150
+
+
+def sell(filename, results):
+    """Sell one unit at a time from a separate process; report how many sales succeeded."""
+    store = SharedInventory(filename, compact_threshold=40)
+    data = store.load()
+    sold = 0
+    for _ in range(SALES_PER_WORKER):
+        applied, _ = store.adjust(data, {"111": -1}, atomic=True)
+        sold += len(applied)
+    results.put(sold)
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "needs fork to start the worker processes")
+class SharedInventoryContentionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "inventory.json")
+        with open(self.filename, 'w') as file:
+            json.dump({"111": {"name": "cola", "price": 2.0, "quantity": STOCK}}, file)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_concurrent_adjust_never_oversells(self):
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        workers = [context.Process(target=sell, args=(self.filename, results)) for _ in range(WORKERS)]
+        for worker in workers:
+            worker.start()
+        sold = sum(results.get(timeout=60) for _ in workers)
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+
+        self.assertEqual(sold, STOCK)
+        data = SharedInventory(self.filename).load()
+        self.assertEqual(data["111"]["quantity"], 0)
+        self.assertEqual(data["111"]["version"], STOCK)
+
+
+if __name__ == "__main__":
+    unittest.main()